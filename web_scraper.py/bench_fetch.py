@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+bench_fetch.py
+
+Offline fetch benchmark: replays the pages saved in scraped_html_files/ from a local HTTP
+server and runs the scraping engines against it. This lets us compare engines and catch
+throughput regressions without touching the brand sites.
+
+- The server answers at each page's original path (from the "URL:" line at the top of the
+  saved file), with an optional latency, jitter and injected errors (half 503s, half dropped
+  connections).
+- Each (engine, workers) combination runs in a fresh process, so its peak RSS is its own.
+- Reported per run: pages/sec, p50 / p99 page latency (fetch + save), failures and peak RSS.
+  Everything goes to bench_results.json; --baseline compares against an earlier file and
+  exits with 1 if throughput dropped by more than --tolerance.
+
+Usage:
+    python bench_fetch.py --engines threads async --workers 1 4 16 --repeat 10 --latency 50 --jitter 20
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+import contextlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+from typing import Dict, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PAGES_DIR = os.path.join(HERE, "scraped_html_files")
+RESULTS_FILE = "bench_results.json"
+ENGINES = {"threads": "scrape_all_urls_parallel", "async": "scrape_all_urls_async"}
+HEADER_END = b"=" * 80 + b"\n\n"  # Written by save_html_to_file after the "URL:" line
+
+
+def load_pages(folder: str = PAGES_DIR) -> Dict[str, bytes]:
+    """Original URL path -> HTML body of every saved page in folder"""
+    pages = {}
+    for name in sorted(os.listdir(folder)):
+        with open(os.path.join(folder, name), "rb") as f:
+            data = f.read()
+        first_line, _, _ = data.partition(b"\n")
+        if not first_line.startswith(b"URL: "):
+            continue
+        url = first_line[5:].decode("utf-8").strip()
+        parts = urlsplit(url)
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+        pages[path] = data.split(HEADER_END, 1)[1] if HEADER_END in data else data
+    return pages
+
+
+class PageServer:
+    """Serves the saved pages on 127.0.0.1 with injected latency, jitter and errors"""
+
+    def __init__(self, pages: Dict[str, bytes], latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, seed: int = 0):
+        self.pages = pages
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.served = 0
+        self.injected = 0
+        self.server: Optional[ThreadingHTTPServer] = None
+
+    def _decide(self) -> tuple:
+        """(seconds to wait, error to inject or None) for one request"""
+        with self.lock:
+            delay = max(0.0, self.latency_ms + self.random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            error = None
+            if self.random.random() < self.error_rate:
+                error = self.random.choice(("503", "drop"))
+                self.injected += 1
+            self.served += 1
+        return delay, error
+
+    def start(self) -> str:
+        """Start serving in the background; returns the base URL"""
+        bench = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, like the real sites
+
+            def do_GET(self):
+                body = bench.pages.get(self.path) or bench.pages.get(self.path.split("?", 1)[0])
+                delay, error = bench._decide()
+                time.sleep(delay)
+                if error == "drop":
+                    self.close_connection = True
+                    self.connection.shutdown(2)
+                    return
+                status = 503 if error else 200 if body is not None else 404
+                body = body if status == 200 else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name="bench-server", daemon=True).start()
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def close(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+def bench_urls(base_url: str, paths: List[str], repeat: int) -> List[str]:
+    """Every page repeat times, each copy under its own query string (so it is saved to its own file)"""
+    urls = []
+    for i in range(repeat):
+        for path in paths:
+            urls.append(base_url + path + (("&" if "?" in path else "?") + f"bench={i}" if i else ""))
+    return urls
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)  # Bytes on macOS, KB elsewhere
+
+
+def time_pages(scraper, latencies: List[float]):
+    """Patch the engines' per-page functions to record how long each page takes"""
+    sync_page, async_page = scraper.scrape_single_page, scraper.scrape_single_page_async
+
+    def scrape_single_page(*args, **kwargs):
+        start = time.monotonic()
+        try:
+            return sync_page(*args, **kwargs)
+        finally:
+            latencies.append(time.monotonic() - start)
+
+    async def scrape_single_page_async(*args, **kwargs):
+        start = time.monotonic()
+        try:
+            return await async_page(*args, **kwargs)
+        finally:
+            latencies.append(time.monotonic() - start)
+
+    scraper.scrape_single_page = scrape_single_page
+    scraper.scrape_single_page_async = scrape_single_page_async
+
+
+def run_one(engine: str, workers: int, urls: List[str]) -> Dict:
+    """One benchmark run in this process (the scraper is configured for it, so run it in a fresh one)"""
+    sys.path.insert(0, HERE)
+    import test as scraper
+
+    if engine == "async" and scraper.import_httpx()[0] is None:
+        return {"engine": engine, "workers": workers, "error": "httpx not installed"}
+    scraper.ADAPTIVE_CONCURRENCY = False  # Fixed pool of `workers`, so runs are comparable
+    scraper.MAX_WORKERS = workers
+    scraper.MAX_IN_FLIGHT = workers
+    scraper.MAX_CONNECTIONS_PER_HOST = workers
+    scraper.MAX_PAGES = None
+    scraper.SUBMIT_WINDOW = 1  # No queued async tasks waiting on the semaphore, so latency means the same in both engines
+    scraper.METRICS = False
+    latencies: List[float] = []
+    time_pages(scraper, latencies)
+    output_dir = tempfile.mkdtemp(prefix="bench_")
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            start = time.monotonic()
+            results = getattr(scraper, ENGINES[engine])(urls, output_dir, scraper.CrawlContext())
+            elapsed = time.monotonic() - start
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+    failed = sum(1 for r in results.values() if r["error"] is not None)
+    return {
+        "engine": engine,
+        "workers": workers,
+        "pages": len(results),
+        "failed": failed,
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(len(results) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "peak_rss_mb": peak_rss_mb(),
+        "bytes": sum(r.get("content_length", 0) for r in results.values()),
+    }
+
+
+def spawn_run(engine: str, workers: int, urls: List[str]) -> Dict:
+    """run_one in a child process; returns its result"""
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump({"engine": engine, "workers": workers, "urls": urls}, f)
+    try:
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", f.name],
+                              capture_output=True, text=True, cwd=HERE)
+    finally:
+        os.remove(f.name)
+    if proc.returncode != 0:
+        return {"engine": engine, "workers": workers, "error": proc.stderr.strip().splitlines()[-1:]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def compare(results: List[Dict], baseline_path: str, tolerance: float) -> bool:
+    """Print the change against an earlier results file; False if any run got slower than tolerance allows"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["engine"], r["workers"]): r for r in json.load(f)["results"] if "error" not in r}
+    ok = True
+    print(f"\n[BASELINE] Against {baseline_path} (tolerance {tolerance:.0%})")
+    for r in results:
+        before = baseline.get((r["engine"], r["workers"]))
+        if before is None or "error" in r:
+            continue
+        change = r["pages_per_sec"] / before["pages_per_sec"] - 1
+        regressed = change < -tolerance
+        ok = ok and not regressed
+        print(f"  {r['engine']:<8} x{r['workers']:<3} {before['pages_per_sec']:>8.1f} -> {r['pages_per_sec']:>8.1f} "
+              f"pages/s ({change:+.1%}), p99 {before['p99_ms']} -> {r['p99_ms']} ms"
+              f"{'  REGRESSION' if regressed else ''}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scraping engines against a local replay of scraped_html_files/")
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 4, 16],
+                        help="Threads (threads engine) / in-flight requests (async engine) per run")
+    parser.add_argument("--repeat", type=int, default=10, help="Times every saved page is fetched per run")
+    parser.add_argument("--latency", type=float, default=50.0, help="Server latency per request in ms")
+    parser.add_argument("--jitter", type=float, default=20.0, help="Latency varies by +- this many ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 503 or dropped")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=RESULTS_FILE)
+    parser.add_argument("--baseline", help="Earlier results file to compare pages/sec against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed pages/sec drop against --baseline")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        with open(args.child, encoding="utf-8") as f:
+            spec = json.load(f)
+        print(json.dumps(run_one(spec["engine"], spec["workers"], spec["urls"])))
+        return
+
+    pages = load_pages()
+    if not pages:
+        print(f"[BENCH] No saved pages in {PAGES_DIR}")
+        sys.exit(1)
+    server = PageServer(pages, args.latency, args.jitter, args.error_rate, args.seed)
+    base_url = server.start()
+    urls = bench_urls(base_url, list(pages), args.repeat)
+    print(f"[BENCH] {len(pages)} pages x {args.repeat} = {len(urls)} URLs per run from {base_url} "
+          f"(latency {args.latency:.0f}+-{args.jitter:.0f} ms, error rate {args.error_rate:.1%})")
+
+    results = []
+    try:
+        for engine in args.engines:
+            for workers in args.workers:
+                r = spawn_run(engine, workers, urls)
+                results.append(r)
+                if "error" in r:
+                    print(f"[BENCH] {engine:<8} x{workers:<3} skipped: {r['error']}")
+                else:
+                    print(f"[BENCH] {engine:<8} x{workers:<3} {r['pages_per_sec']:>8.1f} pages/s  "
+                          f"p50 {r['p50_ms']:>7.1f} ms  p99 {r['p99_ms']:>7.1f} ms  "
+                          f"failed {r['failed']:>3}  peak RSS {r['peak_rss_mb']} MB")
+    finally:
+        server.close()
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "config": {"pages": len(pages), "repeat": args.repeat, "latency_ms": args.latency, "jitter_ms": args.jitter,
+                   "error_rate": args.error_rate, "seed": args.seed, "injected_errors": server.injected},
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"[SAVED] {args.output}")
+    if args.baseline and not compare(results, args.baseline, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+bench_sitemap.py
+
+Synthetic large-sitemap benchmark: generates a sitemap index with tens of thousands of
+page URLs, serves it from a local HTTP server and runs both sitemap implementations on it.
+
+- "scraper" is test.py's extract_urls_from_sitemap (streaming parse, children fetched in
+  parallel); "collector" is sitemap_unilever.py's collect_sitemap_urls (frontier on disk,
+  regex fallback for malformed XML). The collector's politeness pause between sitemaps
+  is turned off, as there is no site to be polite to.
+- Child sitemaps come in several variants: plain, .xml.gz files, plain XML sent with
+  Content-Encoding: gzip, and malformed files (an unescaped "&" in a URL, or cut off
+  before the closing tags). Neighbouring children share one URL, so duplicates are counted too.
+- Each implementation runs in a fresh process. It is measured for discovery time (imports
+  excluded), peak RSS and correctness against the generated URL set: missing URLs (per variant), extra
+  URLs and duplicates. Results go to bench_sitemap_results.json.
+
+Usage:
+    python bench_sitemap.py --children 50 --urls-per-child 1000 --gzip-every 3 --latency 20
+"""
+
+import os
+import sys
+import gzip
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+import contextlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+from typing import Dict, List, Tuple
+
+from bench_fetch import peak_rss_mb
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RESULTS_FILE = "bench_sitemap_results.json"
+IMPLEMENTATIONS = ("scraper", "collector")
+MALFORMED = ("entity", "truncated")
+URLSET_OPEN = b'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+
+
+def child_variant(i: int, children: int, gzip_every: int) -> str:
+    """Variant of the i-th child sitemap: the last ones are malformed, then every gzip_every-th is compressed"""
+    if i >= children - len(MALFORMED):
+        return MALFORMED[i - (children - len(MALFORMED))]
+    if gzip_every and i % gzip_every == gzip_every - 1:
+        return "gzip" if (i // gzip_every) % 2 == 0 else "encoded"
+    return "plain"
+
+
+def build_urlset(urls: List[str], variant: str) -> bytes:
+    entries = []
+    for n, url in enumerate(urls):
+        loc = url if variant == "entity" and n == len(urls) // 2 else url.replace("&", "&amp;")
+        entries.append(f"  <url><loc>{loc}</loc><lastmod>2025-09-{n % 28 + 1:02d}</lastmod>"
+                       f"<changefreq>weekly</changefreq><priority>0.8</priority></url>\n".encode())
+    body = URLSET_OPEN + b"".join(entries)
+    return body if variant == "truncated" else body + b"</urlset>\n"
+
+
+def build_site(base_url: str, children: int, urls_per_child: int, gzip_every: int) -> Tuple[Dict[str, tuple], Dict[str, str]]:
+    """(path -> (body, headers)) of the whole site, and every page URL it lists -> its sitemap's variant"""
+    files = {}
+    expected = {}
+    index = [b'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n']
+    previous_last = None
+    for i in range(children):
+        variant = child_variant(i, children, gzip_every)
+        urls = [f"{base_url}/p/product-{i}-{j}.html" for j in range(urls_per_child)]
+        if variant == "entity":
+            urls[len(urls) // 2] = f"{base_url}/search.html?q=product-{i}&page=2"
+        if previous_last is not None:
+            urls[0] = previous_last  # Listed by two sitemaps
+        previous_last = urls[-1]
+        body = build_urlset(urls, variant)
+        path = f"/sitemaps/part-{i}.xml" + (".gz" if variant == "gzip" else "")
+        if variant == "gzip":
+            files[path] = (gzip.compress(body), {"Content-Type": "application/x-gzip"})
+        elif variant == "encoded":
+            files[path] = (gzip.compress(body), {"Content-Type": "application/xml", "Content-Encoding": "gzip"})
+        else:
+            files[path] = (body, {"Content-Type": "application/xml"})
+        for url in urls:
+            expected.setdefault(url, variant)
+        index.append(f"  <sitemap><loc>{base_url}{path}</loc><lastmod>2025-09-01</lastmod></sitemap>\n".encode())
+    index.append(b"</sitemapindex>\n")
+    files["/sitemap-index.xml"] = (b"".join(index), {"Content-Type": "application/xml"})
+    return files, expected
+
+
+class SitemapServer:
+    """Serves generated sitemaps from memory on 127.0.0.1, each after latency_ms"""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.files: Dict[str, tuple] = {}
+        self.latency_ms = latency_ms
+        self.requests = Counter()
+        self.server = None
+
+    def start(self) -> str:
+        bench = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                bench.requests[self.path] += 1
+                time.sleep(bench.latency_ms / 1000)
+                body, headers = bench.files.get(self.path, (b"", {}))
+                self.send_response(200 if self.path in bench.files else 404)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.server.handle_error = lambda request, address: None  # Clients dropping keep-alive connections
+        threading.Thread(target=self.server.serve_forever, name="bench-sitemaps", daemon=True).start()
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def close(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+def load_discovery(implementation: str, workdir: str):
+    """Import an implementation; returns discover(index_url) -> every page URL it finds (duplicates included)"""
+    sys.path.insert(0, HERE)
+    if implementation == "scraper":
+        import test as scraper
+
+        def discover(index_url: str) -> List[str]:
+            session = scraper.create_session()
+            try:
+                return scraper.extract_urls_from_sitemap(index_url, session, urlparse(index_url).netloc.lower(),
+                                                         {}, {}, meta_dict={})
+            finally:
+                session.close()
+        return discover
+
+    import sitemap_unilever as collector
+    from frontier import Frontier
+    collector.SITEMAP_DELAY_RANGE = (0.0, 0.0)
+
+    def discover(index_url: str) -> List[str]:
+        frontier = Frontier(os.path.join(workdir, "bench_frontier.db"), reset=True)
+        try:
+            collector.collect_sitemap_urls(index_url, use_playwright_fallback=False, frontier=frontier)
+            return list(frontier.iter_urls())
+        finally:
+            frontier.close()
+    return discover
+
+
+def run_one(implementation: str, index_url: str, expected_path: str) -> Dict:
+    """One discovery run in this process, checked against the expected URLs"""
+    with open(expected_path, encoding="utf-8") as f:
+        expected = json.load(f)
+    workdir = tempfile.mkdtemp(prefix="bench_sitemap_")
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            discover = load_discovery(implementation, workdir)
+            loaded_rss = peak_rss_mb()  # Interpreter plus imports, before any sitemap is read
+            start = time.monotonic()
+            found = discover(index_url)
+            elapsed = time.monotonic() - start
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    unique = set(found)
+    missing = Counter(variant for url, variant in expected.items() if url not in unique)
+    return {
+        "implementation": implementation,
+        "seconds": round(elapsed, 3),
+        "urls_per_sec": round(len(unique) / elapsed, 1),
+        "peak_rss_mb": peak_rss_mb(),
+        "loaded_rss_mb": loaded_rss,
+        "expected": len(expected),
+        "found": len(found),
+        "unique": len(unique),
+        "duplicates": len(found) - len(unique),
+        "missing": sum(missing.values()),
+        "missing_by_variant": dict(missing),
+        "extra": len(unique - expected.keys()),
+        "recall": round(1 - sum(missing.values()) / len(expected), 4),
+    }
+
+
+def spawn_run(implementation: str, index_url: str, expected_path: str) -> Dict:
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", implementation, index_url, expected_path],
+                          capture_output=True, text=True, cwd=HERE)
+    if proc.returncode != 0:
+        return {"implementation": implementation, "error": proc.stderr.strip().splitlines()[-1:]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sitemap discovery on a generated sitemap index served locally")
+    parser.add_argument("--implementations", nargs="+", default=list(IMPLEMENTATIONS), choices=IMPLEMENTATIONS)
+    parser.add_argument("--children", type=int, default=50, help="Child sitemaps in the index (the last two are malformed)")
+    parser.add_argument("--urls-per-child", type=int, default=1000)
+    parser.add_argument("--gzip-every", type=int, default=3, help="Every Nth child is gzipped (.xml.gz or Content-Encoding); 0 = none")
+    parser.add_argument("--latency", type=float, default=20.0, help="Server latency per sitemap in ms")
+    parser.add_argument("--output", default=RESULTS_FILE)
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_one(*args.child)))
+        return
+    if args.children <= len(MALFORMED):
+        parser.error(f"--children must be more than {len(MALFORMED)}")
+
+    server = SitemapServer(args.latency)
+    base_url = server.start()
+    server.files, expected = build_site(base_url, args.children, args.urls_per_child, args.gzip_every)
+    index_url = base_url + "/sitemap-index.xml"
+    variants = Counter(child_variant(i, args.children, args.gzip_every) for i in range(args.children))
+    size = sum(len(body) for body, _ in server.files.values())
+    print(f"[BENCH] {args.children} child sitemaps ({', '.join(f'{n} {v}' for v, n in variants.items())}), "
+          f"{len(expected):,} unique URLs, {size / 1024 / 1024:.1f} MB served from {index_url}")
+
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False, encoding="utf-8") as expected_file:
+        json.dump(expected, expected_file)
+    results = []
+    try:
+        for implementation in args.implementations:
+            r = spawn_run(implementation, index_url, expected_file.name)
+            results.append(r)
+            if "error" in r:
+                print(f"[BENCH] {implementation:<9} failed: {r['error']}")
+                continue
+            missing = ", ".join(f"{n} {v}" for v, n in r["missing_by_variant"].items())
+            print(f"[BENCH] {implementation:<9} {r['seconds']:>7.2f}s  {r['urls_per_sec']:>9,.0f} URLs/s  "
+                  f"peak RSS {r['peak_rss_mb']} MB (after imports {r['loaded_rss_mb']})  recall {r['recall']:.2%}"
+                  f"{f' (missing {missing})' if missing else ''}  duplicates {r['duplicates']}  extra {r['extra']}")
+    finally:
+        server.close()
+        os.remove(expected_file.name)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "config": {"children": args.children, "urls_per_child": args.urls_per_child, "gzip_every": args.gzip_every,
+                   "latency_ms": args.latency, "unique_urls": len(expected), "bytes_served": size,
+                   "variants": dict(variants)},
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"[SAVED] {args.output}")
+
+
+if __name__ == "__main__":
+    main()
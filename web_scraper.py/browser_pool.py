@@ -0,0 +1,295 @@
+"""
+browser_pool.py
+
+Long-lived Playwright browser shared by every fallback fetch.
+
+- One Chromium process is launched on first use and kept for the whole run.
+- Up to `size` browser contexts are open at once; each fetch borrows one, opens a tab,
+  and hands the context back, so cookies set by a bot check stay warm for the next URL.
+- A context is recycled (closed and replaced) after `pages_per_context` pages or after
+  repeated failures; its cookies / localStorage carry over to the replacement.
+- If the browser process dies it is relaunched on the next fetch.
+- Optionally aborts requests for images, media, fonts and third-party analytics, which
+  the scraper never needs and which dominate page-load time.
+- A page is judged once it has settled, not by the first response: a bot check answers
+  401/403 and then navigates to the real page, so the pool waits (up to challenge_wait)
+  for the challenge markers to go away. Error pages and unsolved challenges give None.
+- Playwright objects are not thread-safe, so everything runs on one background event loop
+  thread; fetch() can be called from any number of worker threads.
+"""
+
+import time
+import random
+import asyncio
+import threading
+from urllib.parse import urlparse
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from render_detect import CHALLENGE_STATUS_CODES, is_challenge
+
+DEFAULT_LAUNCH_ARGS = ["--no-sandbox", "--disable-setuid-sandbox"]
+MAX_CONTEXT_FAILURES = 2  # Consecutive failed fetches before a context is recycled
+BLOCKED_RESOURCE_TYPES = ("image", "media", "font")
+TRACKER_HOSTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "facebook.net",
+    "hotjar.com",
+    "assets.adobedtm.com",
+    "omtrdc.net",
+    "demdex.net",
+    "bing.com",
+    "clarity.ms",
+    "tiktok.com",
+    "pinimg.com",
+    "licdn.com",
+    "quantserve.com",
+    "scorecardresearch.com",
+)
+
+
+class PooledContext:
+    def __init__(self, context, generation: int):
+        self.context = context
+        self.generation = generation  # Browser launch this context belongs to
+        self.pages_served = 0
+        self.failures = 0
+
+
+class BrowserPool:
+    def __init__(self, size: int = 3, pages_per_context: int = 50, headless: bool = True,
+                 user_agent: Optional[str] = None, extra_headers: Optional[Dict[str, str]] = None,
+                 launch_args: Optional[List[str]] = None, wait_until: str = "networkidle",
+                 timeout_ms: int = 30000, settle_range: Tuple[float, float] = (0.4, 1.2),
+                 block_resource_types: Iterable[str] = (), block_hosts: Iterable[str] = (),
+                 challenge_wait: float = 15.0):
+        """
+        Args:
+            size: Max browser contexts (and so concurrent page loads)
+            pages_per_context: Pages a context serves before it is recycled
+            headless: Run Chromium headless
+            user_agent: User-Agent for every context
+            extra_headers: Headers sent with every request (e.g. referer)
+            launch_args: Chromium command-line flags
+            wait_until: Playwright load state to wait for before reading the page
+            timeout_ms: Navigation timeout per page
+            settle_range: Random pause (seconds) after load before the content is read
+            block_resource_types: Playwright resource types to abort (e.g. BLOCKED_RESOURCE_TYPES)
+            block_hosts: Hosts (and their subdomains) whose requests are aborted (e.g. TRACKER_HOSTS)
+            challenge_wait: Seconds a bot-check page gets to pass and navigate to the real page
+        """
+        self.size = size
+        self.pages_per_context = pages_per_context
+        self.headless = headless
+        self.user_agent = user_agent
+        self.extra_headers = extra_headers or {}
+        self.launch_args = launch_args or DEFAULT_LAUNCH_ARGS
+        self.wait_until = wait_until
+        self.timeout_ms = timeout_ms
+        self.settle_range = settle_range
+        self.block_resource_types = set(block_resource_types)
+        self.block_hosts = tuple(block_hosts)
+        self.challenge_wait = challenge_wait
+
+        self.lock = threading.Lock()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self.available = None  # False once Playwright turned out to be missing or broken
+        self.pw = None
+        self.browser = None
+        self.idle: Optional[asyncio.Queue] = None
+        self.launch_lock: Optional[asyncio.Lock] = None
+        self.open_contexts = 0
+        self.storage_state = None  # Latest cookies / localStorage, seeds new contexts
+        self.pages = 0
+        self.recycled = 0
+        self.launches = 0
+        self.blocked = 0
+
+    # ---------- lifecycle (any thread) ----------
+    def start(self) -> bool:
+        """Start the event loop thread and the browser once; returns False if Playwright is unusable"""
+        with self.lock:
+            if self.available is not None:
+                return self.available
+            self.loop = asyncio.new_event_loop()
+            self.thread = threading.Thread(target=self.loop.run_forever, name="browser-pool", daemon=True)
+            self.thread.start()
+            try:
+                asyncio.run_coroutine_threadsafe(self._startup(), self.loop).result()
+                self.available = True
+            except Exception as e:
+                print("[playwright] Browser pool unavailable:", e)
+                self.available = False
+                self.loop.call_soon_threadsafe(self.loop.stop)
+                self.thread.join()
+            return self.available
+
+    def fetch(self, url: str) -> Optional[bytes]:
+        """Load the URL in a pooled browser tab and return the page content (None on failure)"""
+        if not self.start():
+            return None
+        return asyncio.run_coroutine_threadsafe(self._fetch(url), self.loop).result()
+
+    def close(self):
+        with self.lock:
+            if not self.available:
+                return
+            try:
+                asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result()
+            except Exception as e:
+                print("[playwright] Error while closing browser pool:", e)
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.available = None
+            print(f"[playwright] Browser pool closed: {self.pages} pages, {self.blocked} requests blocked, "
+                  f"{self.recycled} contexts recycled, {self.launches} browser launch(es)")
+
+    # ---------- event loop side ----------
+    async def _startup(self):
+        from playwright.async_api import async_playwright
+        self.pw = await async_playwright().start()
+        self.launch_lock = asyncio.Lock()
+        try:
+            await self._launch()
+        except Exception:
+            await self.pw.stop()
+            raise
+
+    async def _launch(self):
+        print(f"[playwright] Launching shared browser (headless={self.headless}, {self.size} contexts)")
+        self.browser = await self.pw.chromium.launch(headless=self.headless, args=self.launch_args)
+        self.launches += 1
+        self.open_contexts = 0
+        self.idle = asyncio.Queue()
+
+    async def _new_context(self) -> PooledContext:
+        context = await self.browser.new_context(
+            user_agent=self.user_agent,
+            locale="en-US",
+            java_script_enabled=True,
+            viewport={"width": 1280, "height": 800},
+            storage_state=self.storage_state,
+        )
+        if self.extra_headers:
+            await context.set_extra_http_headers(self.extra_headers)
+        if self.block_resource_types or self.block_hosts:
+            await context.route("**/*", self._route)
+        return PooledContext(context, self.launches)
+
+    def is_blocked(self, url: str, resource_type: str) -> bool:
+        if resource_type in self.block_resource_types:
+            return True
+        host = urlparse(url).hostname or ""
+        return any(host == h or host.endswith("." + h) for h in self.block_hosts)
+
+    async def _route(self, route):
+        request = route.request
+        if self.is_blocked(request.url, request.resource_type):
+            self.blocked += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _checkout(self) -> PooledContext:
+        """Borrow an idle context, opening a new one while under the size limit"""
+        while True:
+            async with self.launch_lock:
+                if not self.browser.is_connected():
+                    print("[playwright] Browser disconnected, relaunching")
+                    await self._launch()
+            if self.idle.empty() and self.open_contexts < self.size:
+                self.open_contexts += 1
+                try:
+                    return await self._new_context()
+                except Exception:
+                    self.open_contexts -= 1
+                    raise
+            try:
+                # Time out now and then so waiters notice a relaunch (which replaces the queue)
+                return await asyncio.wait_for(self.idle.get(), timeout=1.0)
+            except asyncio.TimeoutError:
+                continue
+
+    async def _checkin(self, pooled: PooledContext):
+        """Return a context to the pool, replacing it first if it is worn out or unhealthy"""
+        if pooled.generation != self.launches or not self.browser.is_connected():
+            return  # Belongs to a dead browser; _checkout relaunches
+        if pooled.pages_served >= self.pages_per_context or pooled.failures >= MAX_CONTEXT_FAILURES:
+            try:
+                self.storage_state = await pooled.context.storage_state()
+            except Exception:
+                pass
+            try:
+                await pooled.context.close()
+            except Exception:
+                pass
+            self.recycled += 1
+            try:
+                pooled = await self._new_context()
+            except Exception as e:
+                print("[playwright] Could not replace recycled context:", e)
+                self.open_contexts -= 1
+                return
+        self.idle.put_nowait(pooled)
+
+    async def _fetch(self, url: str) -> Optional[bytes]:
+        try:
+            pooled = await self._checkout()
+        except Exception as e:
+            print("[playwright] Could not get a browser context:", e)
+            return None
+        page = None
+        try:
+            page = await pooled.context.new_page()
+            response = await page.goto(url, wait_until=self.wait_until, timeout=self.timeout_ms)
+            status = response.status if response is not None else None
+            if status not in CHALLENGE_STATUS_CODES and (status is None or not 200 <= status < 300):
+                # The browser got an error page too; it must not be saved as the page
+                print(f"[playwright] {url[:60]}... answered {status or 'nothing'}")
+                return None
+            await asyncio.sleep(random.uniform(*self.settle_range))
+            content = await self._settled_content(page)
+            if content is None or is_challenge(content):
+                print(f"[playwright] {url[:60]}... still a bot check ({status}) after {self.challenge_wait:.0f}s")
+                return None
+            pooled.failures = 0
+            self.pages += 1
+            return content
+        except Exception as e:
+            pooled.failures += 1
+            print("[playwright] Error while fetching:", e)
+            return None
+        finally:
+            pooled.pages_served += 1
+            if page is not None:
+                try:
+                    await page.close()
+                except Exception:
+                    pass
+            await self._checkin(pooled)
+
+    async def _settled_content(self, page) -> Optional[bytes]:
+        """Page content once any challenge has navigated on (the challenge page itself if it never does)"""
+        deadline = time.monotonic() + self.challenge_wait
+        content = None
+        while True:
+            try:
+                content = (await page.content()).encode("utf-8")
+            except Exception:  # Read while the challenge was navigating away
+                pass
+            if (content is not None and not is_challenge(content)) or time.monotonic() >= deadline:
+                return content
+            try:
+                await page.wait_for_load_state(self.wait_until, timeout=self.timeout_ms)
+            except Exception:
+                pass
+            await asyncio.sleep(0.5)
+
+    async def _shutdown(self):
+        try:
+            await self.browser.close()
+        finally:
+            await self.pw.stop()
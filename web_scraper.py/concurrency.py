@@ -0,0 +1,182 @@
+"""
+concurrency.py
+
+Per-host adaptive concurrency (AIMD) for the page scraper.
+
+- Each host starts at an initial limit of parallel requests.
+- Healthy responses (fast, non-error) raise the limit additively.
+- 429/503 and timeouts cut it multiplicatively. So does sustained slowness: the median
+  of the host's last slow_window latencies above baseline * tolerance + latency_slack.
+  A single slow response (ordinary tail latency) never cuts the limit.
+- A robots.txt Crawl-delay is kept as the minimum spacing between requests to that host.
+"""
+
+import time
+import asyncio
+import threading
+import statistics
+from collections import deque
+from urllib.parse import urlparse
+from typing import Dict, Optional
+
+THROTTLE_STATUS_CODES = {429, 503}
+
+
+class HostState:
+    def __init__(self, limit: float, min_interval: float):
+        self.limit = limit
+        self.in_flight = 0
+        self.min_interval = min_interval  # Crawl-delay floor between dispatches
+        self.next_dispatch = 0.0
+        self.baseline_latency: Optional[float] = None
+        self.recent = deque()  # Latest latencies, judged together for slowness
+        self.last_decrease = 0.0
+        self.successes = 0
+        self.failures = 0
+
+
+class AdaptiveConcurrency:
+    def __init__(self, initial: int = 4, min_limit: int = 1, max_limit: int = 32,
+                 decrease_factor: float = 0.5, latency_tolerance: float = 2.0,
+                 latency_slack: float = 0.25, slow_window: int = 8, robots=None):
+        """
+        Args:
+            initial: Starting parallel requests per host
+            min_limit: Limit never drops below this
+            max_limit: Limit never grows above this
+            decrease_factor: Multiplier applied to the limit when a host degrades
+            latency_tolerance: Latency above baseline * tolerance + latency_slack counts as slow
+            latency_slack: Seconds of absolute headroom, so fast origins are not cut for jitter
+            slow_window: Recent latencies whose median must be slow before the limit is cut
+            robots: Optional RobotsCache used for the Crawl-delay floor
+        """
+        self.initial = initial
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.latency_slack = latency_slack
+        self.slow_window = slow_window
+        self.robots = robots
+        self.hosts: Dict[str, HostState] = {}
+        self.cond = threading.Condition()
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        return urlparse(url).netloc.lower()
+
+    def prepare(self, url: str) -> HostState:
+        """Create the host's state (looks up robots.txt on first use)"""
+        host = self.host_of(url)
+        with self.cond:
+            state = self.hosts.get(host)
+        if state is not None:
+            return state
+        delay = self.robots.crawl_delay(url) if self.robots else None
+        with self.cond:
+            state = self.hosts.get(host)
+            if state is None:
+                state = HostState(float(self.initial), delay or 0.0)
+                self.hosts[host] = state
+                if delay:
+                    print(f"[concurrency] {host}: robots.txt Crawl-delay {delay}s")
+        return state
+
+    def try_acquire(self, url: str) -> float:
+        """Take a slot for the URL's host; returns 0 on success or seconds to wait"""
+        state = self.prepare(url)
+        with self.cond:
+            now = time.monotonic()
+            if state.in_flight >= int(state.limit):
+                return 0.05
+            if now < state.next_dispatch:
+                return state.next_dispatch - now
+            state.in_flight += 1
+            state.next_dispatch = now + state.min_interval
+            return 0.0
+
+    def acquire(self, url: str):
+        """Block the calling thread until the host has a free slot"""
+        while True:
+            wait = self.try_acquire(url)
+            if wait == 0.0:
+                return
+            with self.cond:
+                self.cond.wait(timeout=wait)
+
+    async def acquire_async(self, url: str):
+        """Wait (without blocking the event loop) until the host has a free slot"""
+        await asyncio.to_thread(self.prepare, url)
+        while True:
+            wait = self.try_acquire(url)
+            if wait == 0.0:
+                return
+            await asyncio.sleep(wait)
+
+    def release(self, url: str, latency: float, status_code: Optional[int] = None, error: bool = False):
+        """Free the slot and adjust the host's limit from this request's outcome"""
+        host = self.host_of(url)
+        with self.cond:
+            state = self.hosts[host]
+            state.in_flight -= 1
+            now = time.monotonic()
+
+            throttled = error or status_code in THROTTLE_STATUS_CODES
+            threshold = (state.baseline_latency * self.latency_tolerance + self.latency_slack
+                         if state.baseline_latency is not None else None)
+            outlier = threshold is not None and latency > threshold
+            slow = False
+            if not throttled:
+                state.recent.append(latency)
+                if len(state.recent) > self.slow_window:
+                    state.recent.popleft()
+                slow = (outlier and len(state.recent) == self.slow_window
+                        and statistics.median(state.recent) > threshold)
+
+            if throttled or slow:
+                state.failures += 1
+                # At most one cut per baseline round-trip, so a burst of errors counts once
+                cooldown = state.baseline_latency or latency
+                if now - state.last_decrease >= cooldown:
+                    state.limit = max(float(self.min_limit), state.limit * self.decrease_factor)
+                    state.last_decrease = now
+                if slow:
+                    # Let the baseline drift slowly so a lasting shift does not pin the limit at min
+                    state.baseline_latency = 0.98 * state.baseline_latency + 0.02 * latency
+                    state.recent.clear()  # The next cut needs another full window of slow responses
+            elif outlier:
+                pass  # One slow response: neither a cut nor a reason to raise the limit
+            else:
+                state.successes += 1
+                # Additive increase: roughly +1 per full window of healthy responses
+                state.limit = min(float(self.max_limit), state.limit + 1.0 / state.limit)
+                if state.baseline_latency is None:
+                    state.baseline_latency = latency
+                else:
+                    state.baseline_latency = 0.9 * state.baseline_latency + 0.1 * latency
+
+            self.cond.notify_all()
+
+    def cancel(self, url: str):
+        """Free a slot without judging the host by it (e.g. a hedged duplicate request)"""
+        with self.cond:
+            self.hosts[self.host_of(url)].in_flight -= 1
+            self.cond.notify_all()
+
+    def limit(self, url_or_host: str) -> int:
+        host = self.host_of(url_or_host) if "://" in url_or_host else url_or_host.lower()
+        with self.cond:
+            state = self.hosts.get(host)
+            return int(state.limit) if state else self.initial
+
+    def limits(self) -> Dict[str, int]:
+        """Current parallel-request limit for every host seen so far"""
+        with self.cond:
+            return {host: int(state.limit) for host, state in self.hosts.items()}
+
+    def print_summary(self):
+        with self.cond:
+            for host, state in self.hosts.items():
+                baseline = f"{state.baseline_latency:.2f}s" if state.baseline_latency else "n/a"
+                print(f"[CONCURRENCY] {host}: limit={int(state.limit)} ok={state.successes} "
+                      f"degraded={state.failures} baseline_latency={baseline}")
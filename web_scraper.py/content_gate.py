@@ -0,0 +1,75 @@
+"""
+content_gate.py
+
+Decides from the response headers whether a page body is worth downloading at all, and
+stops reading a body once the part we need has arrived.
+
+- Only HTML content types are read (a response without Content-Type is let through);
+  PDFs, images and other files listed in a sitemap are skipped before their body is read.
+- A Content-Length above the size limit skips the page too; a body sent without one is
+  dropped as soon as it grows past the limit.
+- Optionally a body ends at an end marker (e.g. b"</main>"): what follows is footer and
+  trailing scripts, so the rest of the response is never downloaded.
+
+Skipped pages raise SkipPage, which the scraper records as a success with nothing saved.
+"""
+
+from typing import Iterable, Optional, Tuple
+
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+
+class SkipPage(Exception):
+    """The page is not worth saving (not HTML, or too large)"""
+
+
+class ContentGate:
+    def __init__(self, content_types: Iterable[str] = HTML_CONTENT_TYPES, max_bytes: Optional[int] = None,
+                 end_marker: Optional[bytes] = None):
+        """
+        Args:
+            content_types: Media types whose bodies are read
+            max_bytes: Pages larger than this are skipped (None = no limit)
+            end_marker: Stop reading the body right after this (case-insensitive), None = read it all
+        """
+        self.content_types = tuple(t.lower() for t in content_types)
+        self.max_bytes = max_bytes
+        self.end_marker = end_marker.lower() if end_marker else None
+
+    def check(self, headers):
+        """Raise SkipPage if the headers already rule the page out"""
+        content_type = headers.get("Content-Type", "").split(";", 1)[0].strip().lower()
+        if content_type and content_type not in self.content_types:
+            raise SkipPage(f"Content-Type {content_type}")
+        length = headers.get("Content-Length")
+        if self.max_bytes and length and length.isdigit() and int(length) > self.max_bytes:
+            raise SkipPage(f"{int(length):,} bytes (limit {self.max_bytes:,})")
+
+    def reader(self) -> "BodyReader":
+        return BodyReader(self.max_bytes, self.end_marker)
+
+
+class BodyReader:
+    """Passes one response body through chunk by chunk, enforcing the size limit and end marker"""
+
+    def __init__(self, max_bytes: Optional[int], end_marker: Optional[bytes]):
+        self.max_bytes = max_bytes
+        self.end_marker = end_marker
+        self.size = 0
+        self.tail = b""  # Last bytes of the previous chunk, for a marker split across two chunks
+        self.truncated = False  # True once the end marker was found
+
+    def feed(self, chunk: bytes) -> Tuple[bytes, bool]:
+        """Returns (bytes to keep, whether to stop reading); raises SkipPage past the size limit"""
+        self.size += len(chunk)
+        if self.max_bytes and self.size > self.max_bytes:
+            raise SkipPage(f"more than {self.max_bytes:,} bytes")
+        if self.end_marker is None:
+            return chunk, False
+        window = self.tail + chunk.lower()
+        found = window.find(self.end_marker)
+        if found < 0:
+            self.tail = window[-(len(self.end_marker) - 1):] if len(self.end_marker) > 1 else b""
+            return chunk, False
+        self.truncated = True
+        return chunk[:found + len(self.end_marker) - len(self.tail)], True
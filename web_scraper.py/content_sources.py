@@ -0,0 +1,274 @@
+"""
+content_sources.py
+
+Lightweight structured-content sources tried before a page's full HTML.
+
+- A source maps a page URL to a structured endpoint and turns its response into
+  {"title", "sections", "links"}; sections are the {"heading", "level", "content": [...]}
+  chunks that chunking.extract_content_chunks produces.
+- to_html() writes that as a small semantic page (<main>, one <section> per heading, <p>
+  per paragraph), so everything downstream (chunkers, render / link detection) reads it
+  like any other saved page, at a few KB instead of ~2 MB of scripts and markup.
+- "aem": the Sling model exporter of Adobe Experience Manager sites (all Unilever brand
+  sites): /us/en/p/x.html -> /us/en/p/x.model.json, the page's component tree as JSON.
+- A source that keeps missing on a host (no endpoint, blocked, not its JSON) is not tried
+  there again, so such hosts cost one extra request per page only MAX_MISSES times.
+"""
+
+import json
+import html
+import threading
+from html.parser import HTMLParser
+from collections import defaultdict
+from urllib.parse import urlparse, urlsplit, urlunsplit
+from typing import Dict, Iterator, List, Optional, Tuple
+
+MAX_MISSES = 3  # Misses in a row (without any hit) that turn a source off for a host
+HEADING_LEVELS = ("h1", "h2", "h3", "h4", "h5", "h6")
+BLOCK_TAGS = ("p", "li", "blockquote", "figcaption", "dd", "dt", "td", "th") + HEADING_LEVELS
+EXCLUDED_COMPONENTS = ("header", "footer", "navigation", "breadcrumb", "cookie", "social", "share",
+                       "newsletter", "modal", "popup", "search", "languagenavigation")
+
+
+class _RichText(HTMLParser):
+    """Splits a rich-text HTML fragment into (tag, text) blocks and collects its links"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks: List[Tuple[str, str]] = []
+        self.links: List[str] = []
+        self.tag = "p"
+        self.text: List[str] = []
+
+    def _end_block(self):
+        text = " ".join("".join(self.text).split())
+        if text:
+            self.blocks.append((self.tag, text))
+        self.text = []
+        self.tag = "p"
+
+    def handle_starttag(self, tag, attrs):
+        if tag in BLOCK_TAGS or tag == "br":
+            self._end_block()
+            self.tag = tag if tag in HEADING_LEVELS else "p"
+        elif tag == "a":
+            href = dict(attrs).get("href")
+            if href:
+                self.links.append(href)
+
+    def handle_endtag(self, tag):
+        if tag in BLOCK_TAGS:
+            self._end_block()
+
+    def handle_data(self, data):
+        self.text.append(data)
+
+    @classmethod
+    def parse(cls, fragment: str) -> "_RichText":
+        parser = cls()
+        parser.feed(fragment)
+        parser.close()
+        parser._end_block()
+        return parser
+
+
+class PageBuilder:
+    """Collects headings and paragraphs in page order, dropping repeated text"""
+
+    def __init__(self, title: Optional[str] = None):
+        self.title = title
+        self.sections: List[Dict] = []
+        self.links: List[str] = []
+        self.seen = set()
+        if title:
+            self.heading(title, "h1")
+
+    def heading(self, text: str, level: str = "h2"):
+        text = " ".join(text.split())
+        if text and text not in self.seen:
+            self.seen.add(text)
+            self.sections.append({"heading": text, "level": level, "content": []})
+
+    def paragraph(self, text: str):
+        text = " ".join(text.split())
+        if not text or text in self.seen:
+            return
+        self.seen.add(text)
+        if not self.sections:
+            self.sections.append({"heading": None, "level": None, "content": []})
+        self.sections[-1]["content"].append(text)
+
+    def rich_text(self, fragment: str):
+        parsed = _RichText.parse(fragment)
+        for tag, text in parsed.blocks:
+            if tag in HEADING_LEVELS:
+                self.heading(text, tag)
+            else:
+                self.paragraph(text)
+        self.links.extend(parsed.links)
+
+    def page(self) -> Optional[Dict]:
+        if not any(section["content"] for section in self.sections):
+            return None  # Nothing worth keeping: let the HTML page be fetched instead
+        return {"title": self.title, "sections": self.sections, "links": self.links}
+
+
+class AemModelSource:
+    """Adobe Experience Manager page model (Sling model exporter, .model.json)"""
+    name = "aem"
+    title_fields = ("jcr:title", "title", "heading", "productName", "name")
+    text_fields = ("text", "description", "subtitle", "shortDescription", "longDescription",
+                   "ingredients", "howToUse", "caption", "body")
+    link_fields = ("link", "url", "href", "linkURL", "ctaLink")
+
+    def source_url(self, url: str) -> Optional[str]:
+        parts = urlsplit(url)
+        path = parts.path
+        if ".html" not in path:
+            if path.endswith("/"):
+                return None  # A folder URL has no page name to hang .model.json on
+            path += ".html"
+        # Keeps a suffix: /p/x.html/0001 -> /p/x.model.json/0001
+        return urlunsplit(parts._replace(path=path.replace(".html", ".model.json", 1), fragment=""))
+
+    @staticmethod
+    def _children(node: Dict) -> Iterator[Dict]:
+        items = node.get(":items") or {}
+        if isinstance(items, list):  # Some exporters emit the children as a plain list
+            yield from (child for child in items if isinstance(child, dict))
+            return
+        if not isinstance(items, dict):
+            return
+        order = node.get(":itemsOrder")
+        for key in order if isinstance(order, list) else list(items):
+            child = items.get(key) if isinstance(key, str) else None
+            if isinstance(child, dict):
+                yield child
+
+    def _walk(self, node: Dict, builder: PageBuilder):
+        for child in self._children(node):
+            component = (child.get(":type") or "").lower().rsplit("/", 1)[-1]
+            if any(name in component for name in EXCLUDED_COMPONENTS):
+                continue
+            self._component(child, component, builder)
+            self._walk(child, builder)
+
+    def _component(self, node: Dict, component: str, builder: PageBuilder):
+        level = node.get("type") if node.get("type") in HEADING_LEVELS else None
+        if component.endswith("title"):
+            # Core title component: the heading is its text, its level is in "type"
+            text = node.get("text") or node.get("jcr:title")
+            if isinstance(text, str):
+                builder.heading(html.unescape(text), level or "h2")
+            return
+        level = level or "h3"
+        for field in self.title_fields:
+            if isinstance(node.get(field), str):
+                builder.heading(html.unescape(node[field]), level)
+                break
+        for field in self.text_fields:
+            value = node.get(field)
+            if isinstance(value, str):
+                if node.get("richText") or "<" in value:
+                    builder.rich_text(value)
+                else:
+                    builder.paragraph(html.unescape(value))
+        for field in self.link_fields:
+            if isinstance(node.get(field), str):
+                builder.links.append(node[field])
+
+    def extract(self, body: bytes) -> Optional[Dict]:
+        model = json.loads(body)
+        if not isinstance(model, dict) or ":items" not in model:
+            return None  # Some other JSON (or an error object), not a page model
+        builder = PageBuilder(model.get("title"))
+        self._walk(model, builder)
+        return builder.page()
+
+
+SOURCES = {source.name: source for source in (AemModelSource,)}
+
+
+def to_html(url: str, page: Dict) -> str:
+    """The small HTML page saved in place of the full one"""
+    esc = html.escape
+    out = [f'<html><head><meta name="source-url" content="{esc(url)}"><title>{esc(page["title"] or "")}</title>'
+           "</head><body><main>"]
+    for section in page["sections"]:
+        out.append("<section>")
+        if section["heading"]:
+            out.append(f"<{section['level']}>{esc(section['heading'])}</{section['level']}>")
+        out.extend(f"<p>{esc(text)}</p>" for text in section["content"])
+        out.append("</section>")
+    out.append("</main>")
+    if page["links"]:
+        # Outside <main> and in <nav>, so chunkers skip it while link discovery still sees it
+        out.append("<nav>" + "".join(f'<a href="{esc(link, quote=True)}"></a>' for link in page["links"]) + "</nav>")
+    out.append("</body></html>")
+    return "\n".join(out)
+
+
+class ContentSources:
+    def __init__(self, names: List[str], max_misses: int = MAX_MISSES):
+        """
+        Args:
+            names: Sources to try in order (keys of SOURCES) before falling back to the page's HTML
+            max_misses: Misses in a row, without a single hit, that turn a source off for a host
+        """
+        unknown = [name for name in names if name not in SOURCES]
+        if unknown:
+            raise ValueError(f"Unknown content source(s): {', '.join(unknown)} (known: {', '.join(SOURCES)})")
+        self.sources = [SOURCES[name]() for name in names]
+        self.max_misses = max_misses
+        self.lock = threading.Lock()
+        self.hits: Dict[tuple, int] = defaultdict(int)  # (source, host) -> pages
+        self.misses: Dict[tuple, int] = defaultdict(int)  # (source, host) -> misses in a row
+        self.fetched_bytes: Dict[str, int] = defaultdict(int)
+
+    def candidates(self, url: str) -> List[tuple]:
+        """(source, endpoint URL) pairs to try for a page, in order"""
+        host = urlparse(url).netloc.lower()
+        pairs = []
+        with self.lock:
+            for source in self.sources:
+                key = (source.name, host)
+                if self.misses[key] >= self.max_misses and not self.hits[key]:
+                    continue
+                source_url = source.source_url(url)
+                if source_url:
+                    pairs.append((source, source_url))
+        return pairs
+
+    def convert(self, source, url: str, status_code: Optional[int], body: Optional[bytes]) -> Optional[str]:
+        """The normalized HTML page for a source's response, or None (a miss: fall back to the next source / HTML)"""
+        page = None
+        if status_code == 200 and body:
+            try:
+                page = source.extract(body)
+            except ValueError:  # Not JSON (e.g. a soft-404 HTML page)
+                page = None
+            except Exception as e:  # Unexpected shape: a miss, so the HTML path still runs
+                print(f"[sources] {source.name} could not read {url}: {type(e).__name__}: {e}")
+                page = None
+        key = (source.name, urlparse(url).netloc.lower())
+        with self.lock:
+            if page is None:
+                self.misses[key] += 1
+                if self.misses[key] == self.max_misses and not self.hits[key]:
+                    print(f"[sources] {source.name} gave nothing for {self.max_misses} pages on {key[1]}, "
+                          f"using plain HTML there")
+                return None
+            self.misses[key] = 0
+            self.hits[key] += 1
+            self.fetched_bytes[source.name] += len(body)
+        return to_html(url, page)
+
+    def print_summary(self):
+        with self.lock:
+            for source in self.sources:
+                pages = sum(n for (name, _), n in self.hits.items() if name == source.name)
+                off = [host for (name, host), n in self.misses.items()
+                       if name == source.name and n >= self.max_misses and not self.hits[(name, host)]]
+                print(f"[SOURCES] {source.name}: {pages} pages from structured content "
+                      f"({self.fetched_bytes[source.name]:,} bytes fetched)"
+                      + (f", off for {', '.join(off)}" if off else ""))
@@ -0,0 +1,87 @@
+"""
+crawl_journal.py
+
+Append-only, crash-safe journal of per-URL crawl outcomes.
+
+- One JSON line per finished URL (the same result dict the scraper builds).
+- Records are buffered and written + fsynced every batch_size URLs, so a crash loses
+  at most one batch.
+- load() replays the journal (last record per URL wins, torn last line ignored), which
+  is how --resume skips finished pages and rebuilds the final report.
+"""
+
+import os
+import json
+import time
+import threading
+from typing import Dict, List, Set
+
+JOURNAL_FILE = "crawl_journal.jsonl"
+
+
+class CrawlJournal:
+    def __init__(self, path: str = JOURNAL_FILE, batch_size: int = 100, resume: bool = False):
+        """
+        Args:
+            path: Journal file
+            batch_size: Records buffered before each write + fsync
+            resume: Keep the existing journal and append to it (otherwise start empty)
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.lock = threading.Lock()
+        self.buffer: List[str] = []
+        self.file = open(path, "a" if resume else "w", encoding="utf-8")
+        if resume and self.file.tell() > 0 and not self._ends_with_newline():
+            # Terminate a torn last line so the next record starts on its own line
+            self.file.write("\n")
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def record(self, result: Dict):
+        line = json.dumps(dict(result, ts=time.time()), ensure_ascii=False)
+        with self.lock:
+            self.buffer.append(line)
+            if len(self.buffer) >= self.batch_size:
+                self._flush_locked()
+
+    def _flush_locked(self):
+        if not self.buffer:
+            return
+        self.file.write("\n".join(self.buffer) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.buffer.clear()
+
+    def flush(self):
+        with self.lock:
+            self._flush_locked()
+
+    def close(self):
+        with self.lock:
+            self._flush_locked()
+            self.file.close()
+
+    @staticmethod
+    def load(path: str = JOURNAL_FILE) -> Dict[str, Dict]:
+        """Replay a journal into {url: latest result}"""
+        results = {}
+        if not os.path.exists(path):
+            return results
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Torn write from a crash
+                record.pop("ts", None)
+                results[record["url"]] = record
+        return results
+
+    @staticmethod
+    def completed_urls(results: Dict[str, Dict]) -> Set[str]:
+        """URLs whose latest journal record succeeded (failed ones are retried on resume)"""
+        return {url for url, r in results.items() if r.get("error") is None}
@@ -0,0 +1,388 @@
+"""
+crawl_metrics.py
+
+Per-request timings and crawl counters, live over HTTP and as a JSON summary at the end.
+
+- Each request is split into phases: dns, connect, tls (only when a new connection is
+  opened), ttfb (request sent -> response headers, i.e. the origin's think time) and
+  download (headers -> body read), plus total. slot_wait (time spent waiting for a
+  per-host slot) and page (whole page: fetch, save, render) show what our own code adds.
+- Phases go into fixed-bucket histograms per host; status codes, bytes, errors, retries
+  and new connections are counted per host.
+- serve(port) exposes everything in Prometheus text format at /metrics (and the JSON
+  summary at /summary.json) on 127.0.0.1 while the crawl runs.
+- requests / urllib3: TimedAdapter times connect and TLS per connection; DNS is timed by
+  wrapping socket.getaddrinfo, which only records for threads with a request in progress.
+  The wrapper is installed process-wide (instrument() replaces socket.getaddrinfo for every
+  caller, not just the crawler's session); other lookups pass straight through untimed.
+  httpx: the "trace" request extension reports connect (DNS included) and TLS.
+"""
+
+import json
+import time
+import socket
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+from typing import Callable, Dict, List, Optional
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PHASES = ("dns", "connect", "tls", "ttfb", "download", "total", "slot_wait", "page")
+
+_local = threading.local()  # .timing = the RequestTiming of the request this thread is sending
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # Last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        value = max(0.0, value)
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                break
+        else:
+            i = len(BUCKETS)
+        self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate from the buckets (linear within a bucket)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = BUCKETS[i - 1] if i > 0 else 0.0
+                upper = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return BUCKETS[-1]
+
+    def to_dict(self) -> Dict:
+        return {"count": self.count, "sum": round(self.sum, 6), "buckets": self.counts,
+                "avg": round(self.sum / self.count, 6) if self.count else None,
+                **{f"p{int(q * 100)}": round(v, 6) if v is not None else None
+                   for q in (0.5, 0.95, 0.99) for v in [self.quantile(q)]}}
+
+    def absorb(self, data: Dict):
+        self.counts = [a + b for a, b in zip(self.counts, data["buckets"])]
+        self.sum += data["sum"]
+        self.count += data["count"]
+
+
+class HostStats:
+    def __init__(self):
+        self.phases: Dict[str, Histogram] = defaultdict(Histogram)
+        self.statuses: Dict[str, int] = defaultdict(int)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.bytes = 0
+        self.retries = 0
+        self.new_connections = 0
+
+    def to_dict(self) -> Dict:
+        return {"requests": sum(self.statuses.values()), "statuses": dict(self.statuses),
+                "errors": dict(self.errors), "bytes": self.bytes, "retries": self.retries,
+                "new_connections": self.new_connections,
+                "phases": {phase: h.to_dict() for phase, h in self.phases.items()}}
+
+    def absorb(self, data: Dict):
+        for phase, h in data["phases"].items():
+            self.phases[phase].absorb(h)
+        for key, n in data["statuses"].items():
+            self.statuses[key] += n
+        for key, n in data["errors"].items():
+            self.errors[key] += n
+        self.bytes += data["bytes"]
+        self.retries += data["retries"]
+        self.new_connections += data["new_connections"]
+
+
+class RequestTiming:
+    """Timestamps of one request, filled in by the connection hooks and the fetch code"""
+
+    def __init__(self, metrics: "CrawlMetrics", url: str):
+        self.metrics = metrics
+        self.host = urlparse(url).netloc.lower()
+        self.start = time.monotonic()
+        self.dns: Optional[float] = None
+        self.connect: Optional[float] = None
+        self.tls: Optional[float] = None
+        self.headers_at: Optional[float] = None
+        self.status: Optional[int] = None
+        self._marks: Dict[str, float] = {}
+
+    def headers(self, status: int, elapsed: Optional[float] = None):
+        """Response headers are in (elapsed: seconds since start, if measured by the client)"""
+        self.status = status
+        self.headers_at = self.start + elapsed if elapsed is not None else time.monotonic()
+
+    async def trace(self, event: str, info: Dict):
+        """httpx / httpcore "trace" extension callback (async clients)"""
+        name, _, stage = event.rpartition(".")
+        now = time.monotonic()
+        if stage == "started":
+            self._marks[name] = now
+        elif stage == "complete" and name in self._marks:
+            took = now - self._marks.pop(name)
+            if name == "connection.connect_tcp":
+                self.connect = took  # Includes DNS: httpcore resolves while connecting
+            elif name == "connection.start_tls":
+                self.tls = (self.tls or 0.0) + took
+
+
+class _TimedConnectionMixin:
+    def _new_conn(self):
+        timing = getattr(_local, "timing", None)
+        dns_before = (timing.dns or 0.0) if timing is not None else 0.0
+        start = time.monotonic()
+        sock = super()._new_conn()
+        if timing is not None:
+            # getaddrinfo ran inside; its time is already in timing.dns
+            timing.connect = time.monotonic() - start - ((timing.dns or 0.0) - dns_before)
+        return sock
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    def connect(self):
+        timing = getattr(_local, "timing", None)
+        start = time.monotonic()
+        super().connect()
+        if timing is not None:
+            # connect() = _new_conn() (DNS + TCP) + TLS handshake
+            timing.tls = time.monotonic() - start - (timing.connect or 0.0) - (timing.dns or 0.0)
+
+
+class _TimedHTTPPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+TIMED_POOLS = {"http": _TimedHTTPPool, "https": _TimedHTTPSPool}
+
+
+class TimedAdapter(HTTPAdapter):
+    """requests adapter whose connections report connect / TLS time to the request being sent"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = TIMED_POOLS
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+        if not proxy.lower().startswith("socks"):  # SOCKS managers bring their own pools
+            manager.pool_classes_by_scheme = TIMED_POOLS
+        return manager
+
+
+_getaddrinfo = socket.getaddrinfo
+
+
+def _timed_getaddrinfo(*args, **kwargs):
+    timing = getattr(_local, "timing", None)
+    if timing is None:
+        return _getaddrinfo(*args, **kwargs)
+    start = time.monotonic()
+    try:
+        return _getaddrinfo(*args, **kwargs)
+    finally:
+        timing.dns = (timing.dns or 0.0) + time.monotonic() - start
+
+
+def instrument(session):
+    """
+    Mount TimedAdapter on a requests session (same pool sizes as the adapters it replaces)
+
+    Also replaces socket.getaddrinfo for the whole process: urllib3 resolves through the
+    socket module, so DNS cannot be timed per session. Lookups outside a request started
+    with CrawlMetrics.start() (other sessions, other libraries) are passed through as is.
+    """
+    socket.getaddrinfo = _timed_getaddrinfo  # Records only for threads between start() and detach()
+    for prefix in ("http://", "https://"):
+        old = session.adapters.get(prefix)
+        kwargs = {"pool_connections": old._pool_connections, "pool_maxsize": old._pool_maxsize,
+                  "max_retries": old.max_retries, "pool_block": old._pool_block} if old else {}
+        session.mount(prefix, TimedAdapter(**kwargs))
+    return session
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class CrawlMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hosts: Dict[str, HostStats] = defaultdict(HostStats)
+        self.gauges: Dict[str, Callable[[], float]] = {}
+        self.started = time.time()
+        self.server: Optional[ThreadingHTTPServer] = None
+
+    # ---------- recording ----------
+    def start(self, url: str, attach: bool = True) -> RequestTiming:
+        """A request is about to be sent (attach: from this thread, through an instrumented session)"""
+        timing = RequestTiming(self, url)
+        if attach:
+            _local.timing = timing
+        return timing
+
+    @staticmethod
+    def detach():
+        """The request has its response (or failed); stop attributing this thread's DNS / connects to it"""
+        _local.timing = None
+
+    def failed(self, timing: RequestTiming, error: str):
+        """No response at all (timeout, connection error, ...)"""
+        with self.lock:
+            stats = self.hosts[timing.host]
+            stats.errors[error] += 1
+            self._observe_connection(stats, timing)
+
+    def finish(self, timing: RequestTiming, size: int):
+        """The response body has been read (size bytes); record the request"""
+        now = time.monotonic()
+        headers_at = timing.headers_at or now
+        with self.lock:
+            stats = self.hosts[timing.host]
+            stats.statuses[str(timing.status)] += 1
+            stats.bytes += size
+            self._observe_connection(stats, timing)
+            setup = (timing.dns or 0.0) + (timing.connect or 0.0) + (timing.tls or 0.0)
+            stats.phases["ttfb"].observe(headers_at - timing.start - setup)
+            stats.phases["download"].observe(now - headers_at)
+            stats.phases["total"].observe(now - timing.start)
+
+    @staticmethod
+    def _observe_connection(stats: HostStats, timing: RequestTiming):
+        if timing.connect is None:
+            return  # Reused a pooled connection
+        stats.new_connections += 1
+        for phase in ("dns", "connect", "tls"):
+            value = getattr(timing, phase)
+            if value is not None:
+                stats.phases[phase].observe(value)
+
+    def observe(self, url: str, phase: str, seconds: float):
+        """Record a phase outside the request itself (slot_wait, page)"""
+        with self.lock:
+            self.hosts[urlparse(url).netloc.lower()].phases[phase].observe(seconds)
+
+    def retried(self, urls: List[str]):
+        with self.lock:
+            for url in urls:
+                self.hosts[urlparse(url).netloc.lower()].retries += 1
+
+    def gauge(self, name: str, fn: Callable[[], float]):
+        """Export fn() as a gauge (e.g. pages finished so far)"""
+        self.gauges[name] = fn
+
+    # ---------- output ----------
+    def summary(self) -> Dict:
+        with self.lock:
+            return {"started": self.started, "elapsed_seconds": round(time.time() - self.started, 3),
+                    "gauges": {name: fn() for name, fn in self.gauges.items()},
+                    "hosts": {host: stats.to_dict() for host, stats in self.hosts.items()}}
+
+    def absorb(self, summary: Dict):
+        """Add the per-host numbers of another run's summary (e.g. a worker process)"""
+        with self.lock:
+            for host, data in summary["hosts"].items():
+                self.hosts[host].absorb(data)
+
+    def prometheus(self) -> str:
+        lines = ["# HELP crawl_phase_seconds Time per request phase and per page, by host",
+                 "# TYPE crawl_phase_seconds histogram"]
+        counters = {"crawl_requests_total": [], "crawl_response_bytes_total": [], "crawl_request_errors_total": [],
+                    "crawl_retries_total": [], "crawl_new_connections_total": []}
+        with self.lock:
+            for host, stats in sorted(self.hosts.items()):
+                h = _escape(host)
+                for phase, hist in sorted(stats.phases.items()):
+                    labels = f'host="{h}",phase="{phase}"'
+                    cumulative = 0
+                    for bound, n in zip(BUCKETS + ("+Inf",), hist.counts):
+                        cumulative += n
+                        lines.append(f'crawl_phase_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                    lines.append(f"crawl_phase_seconds_sum{{{labels}}} {hist.sum:.6f}")
+                    lines.append(f"crawl_phase_seconds_count{{{labels}}} {hist.count}")
+                counters["crawl_requests_total"] += [f'{{host="{h}",status="{s}"}} {n}' for s, n in stats.statuses.items()]
+                counters["crawl_request_errors_total"] += [f'{{host="{h}",error="{_escape(e)}"}} {n}'
+                                                           for e, n in stats.errors.items()]
+                counters["crawl_response_bytes_total"].append(f'{{host="{h}"}} {stats.bytes}')
+                counters["crawl_retries_total"].append(f'{{host="{h}"}} {stats.retries}')
+                counters["crawl_new_connections_total"].append(f'{{host="{h}"}} {stats.new_connections}')
+            for name, samples in counters.items():
+                lines.append(f"# TYPE {name} counter")
+                lines += [name + sample for sample in samples]
+            for name, fn in self.gauges.items():
+                lines += [f"# TYPE {name} gauge", f"{name} {fn()}"]
+        return "\n".join(lines) + "\n"
+
+    def write_summary(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+        print(f"[METRICS] Summary written to {path}")
+
+    def print_summary(self):
+        """One line per host: where a request's time goes (medians)"""
+        for host, data in self.summary()["hosts"].items():
+            phases = data["phases"]
+            parts = [f"{phase} {phases[phase]['p50'] * 1000:.0f}ms" for phase in PHASES
+                     if phase in phases and phases[phase]["p50"] is not None]
+            print(f"[METRICS] {host}: {data['requests']} requests, {data['new_connections']} new connections, "
+                  f"median " + ", ".join(parts))
+
+    # ---------- endpoint ----------
+    def serve(self, port: int, host: str = "127.0.0.1") -> bool:
+        """Serve /metrics and /summary.json in a background thread; False if the port is taken"""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body, ctype = metrics.prometheus().encode("utf-8"), "text/plain; version=0.0.4"
+                elif self.path == "/summary.json":
+                    body, ctype = json.dumps(metrics.summary()).encode("utf-8"), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            self.server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e:
+            print(f"[METRICS] Could not listen on {host}:{port} ({e}), no live endpoint")
+            return False
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name="metrics-endpoint", daemon=True).start()
+        print(f"[METRICS] Live metrics at http://{host}:{port}/metrics")
+        return True
+
+    def close(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
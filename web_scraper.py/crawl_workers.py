@@ -0,0 +1,121 @@
+"""
+crawl_workers.py
+
+Coordinator / worker mode: one crawl spread over several processes.
+
+- The coordinator discovers the URLs and queues them in the frontier; each worker process
+  then leases batches of its own shard from it (by default shard = hash of the URL's host, so every
+  host is fetched by one process and its politeness limits still hold).
+- Workers report every result straight to the frontier; their journal and validator cache
+  go to per-shard files (crawl_journal.w0.jsonl, ...) that the coordinator merges at the end.
+- The coordinator hands out leases that expired (a stuck worker) again, releases the
+  leases of a worker that crashed and restarts it.
+- Extra workers can be started by hand (`test.py --worker 2/4`), also on another machine
+  sharing the crawl folder: leases are taken in one SQLite transaction, so two workers
+  on one shard never get the same URL.
+"""
+
+import os
+import sys
+import glob
+import time
+import socket
+import multiprocessing
+from multiprocessing.connection import wait
+from contextlib import redirect_stdout
+from typing import Callable, Dict, List
+
+LOG_FILE = "crawl_worker{shard}.log"
+POLL_SECONDS = 5.0  # Lease checks / progress lines while workers run
+MAX_RESTARTS = 3  # Per shard, for workers that crash
+
+
+def worker_owner(shard: int) -> str:
+    """Lease owner name of a worker: unique per machine and process"""
+    return f"w{shard}@{socket.gethostname()}:{os.getpid()}"
+
+
+def worker_owner_prefix(shard: int) -> str:
+    """Start of every lease owner name of a shard's workers on this machine"""
+    return f"w{shard}@{socket.gethostname()}:"
+
+
+def shard_path(path: str, shard: int) -> str:
+    """Per-shard variant of a file, e.g. crawl_journal.jsonl -> crawl_journal.w3.jsonl"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.w{shard}{ext}"
+
+
+def shard_files(path: str) -> List[str]:
+    """Every per-shard variant of path left on disk"""
+    root, ext = os.path.splitext(path)
+    return sorted(glob.glob(f"{glob.escape(root)}.w[0-9]*{ext}"))
+
+
+def parse_shard(spec: str) -> tuple:
+    """'2/4' -> (2, 4)"""
+    shard, shards = (int(part) for part in spec.split("/"))
+    if not 0 <= shard < shards:
+        raise ValueError(f"Shard must be between 0 and {shards - 1}: {spec}")
+    return shard, shards
+
+
+def _run_worker(worker_fn: Callable, shard: int, shards: int):
+    """Worker process: crawl one shard with output going to its own log file"""
+    with open(LOG_FILE.format(shard=shard), "a", encoding="utf-8", buffering=1) as log, redirect_stdout(log):
+        sys.stderr = log
+        worker_fn(shard, shards)
+
+
+def run_workers(worker_fn: Callable, shards: int, frontier, poll: float = POLL_SECONDS,
+                max_restarts: int = MAX_RESTARTS) -> Dict[int, int]:
+    """
+    Run one worker process per shard until every shard is finished
+
+    Args:
+        worker_fn: worker_fn(shard, shards) crawls the shard's pending frontier URLs
+        shards: Number of worker processes / shards
+        frontier: The coordinator's Frontier, used to reclaim leases and report progress
+        poll: Seconds between lease checks and progress lines
+        max_restarts: Restarts per shard after a crash
+    Returns:
+        shard -> exit code of its last worker process
+    """
+    restarts = {shard: 0 for shard in range(shards)}
+    exit_codes: Dict[int, int] = {}
+
+    def start(shard):
+        process = multiprocessing.Process(target=_run_worker, args=(worker_fn, shard, shards),
+                                          name=f"crawl-worker-{shard}")
+        process.start()
+        print(f"[WORKERS] Shard {shard}/{shards} started (pid {process.pid}, log {LOG_FILE.format(shard=shard)})")
+        return process
+
+    print(f"[WORKERS] Crawling with {shards} worker processes")
+    start_time = time.time()
+    processes = {shard: start(shard) for shard in range(shards)}
+    while processes:
+        ready = wait([process.sentinel for process in processes.values()], timeout=poll)
+        for process in processes.values():
+            if process.sentinel in ready:
+                process.join()  # The sentinel fires as the process exits; wait for its exit code
+        reclaimed = frontier.reclaim_expired()
+        if reclaimed:
+            print(f"[WORKERS] {reclaimed} expired leases put back to pending")
+        for shard, process in list(processes.items()):
+            if process.is_alive():
+                continue
+            del processes[shard]
+            exit_codes[shard] = process.exitcode
+            if process.exitcode == 0:
+                print(f"[WORKERS] Shard {shard} finished")
+                continue
+            released = frontier.release(worker_owner_prefix(shard))
+            print(f"[WORKERS] Shard {shard} worker died (exit code {process.exitcode}), "
+                  f"{released} leased URLs put back to pending")
+            if restarts[shard] < max_restarts:
+                restarts[shard] += 1
+                processes[shard] = start(shard)
+        counts = frontier.counts()
+        print(f"[WORKERS] {time.time() - start_time:.0f}s: " + ", ".join(f"{s} {n}" for s, n in counts.items()))
+    return exit_codes
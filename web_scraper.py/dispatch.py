@@ -0,0 +1,47 @@
+"""
+dispatch.py
+
+Windowed task dispatch over lazily consumed work items.
+
+- At most `window` tasks are submitted but unfinished at any time; the next item is pulled
+  from the iterator only when a task finishes.
+- Items can come from a generator (e.g. lines of urls.txt), so neither the URL list nor the
+  futures for it ever have to be held in memory all at once.
+- Results are yielded as they complete, for the caller to stream to a sink.
+"""
+
+import asyncio
+from itertools import islice
+from concurrent.futures import Executor, wait, FIRST_COMPLETED
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def run_windowed(executor: Executor, fn: Callable[[T], R], items: Iterable[T], window: int) -> Iterator[R]:
+    """Yield fn(item) for every item (in completion order), keeping at most `window` tasks outstanding"""
+    items = iter(items)
+    pending = {executor.submit(fn, item) for item in islice(items, window)}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for item in islice(items, len(done)):
+            pending.add(executor.submit(fn, item))
+        for future in done:
+            yield future.result()
+
+
+async def run_windowed_async(fn: Callable[[T], Awaitable[R]], items: Iterable[T], window: int) -> AsyncIterator[R]:
+    """Async run_windowed: at most `window` fn(item) tasks alive at once"""
+    items = iter(items)
+    pending = {asyncio.create_task(fn(item)) for item in islice(items, window)}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for item in islice(items, len(done)):
+                pending.add(asyncio.create_task(fn(item)))
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,366 @@
+"""
+frontier.py
+
+Disk-backed URL frontier: the crawl's work queue and seen-set in one SQLite file.
+
+- Every URL is one row with its state: pending -> in_flight -> done / failed.
+- Dequeue takes the highest-priority, then oldest, pending rows through the
+  (state, priority, id) index, so it costs the same whether 10 or 10 million URLs are
+  queued; nothing is held in Python lists.
+- A Bloom filter in front of the table answers "never seen" without touching SQLite;
+  only possible duplicates are looked up.
+- The database is in WAL mode, so progress can be inspected while a crawl runs, e.g.
+      sqlite3 frontier.db "SELECT state, COUNT(*) FROM urls GROUP BY state"
+- Dequeued rows are leased to the Frontier instance (process) that took them, optionally
+  for a limited time and only from one host-hash shard, so several worker processes can
+  share one frontier file; expired leases are handed out again by reclaim_expired().
+- Rows left in_flight by a crash are handed out again by requeue(); with before_commit set to
+  the journal's flush, a row is never marked done before its journal record is on disk.
+- Each row also keeps the link depth it was found at, for the link-discovery crawl.
+"""
+
+import os
+import math
+import time
+import zlib
+import socket
+import sqlite3
+import hashlib
+import threading
+from urllib.parse import urlparse
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+PENDING = "pending"
+IN_FLIGHT = "in_flight"
+DONE = "done"
+FAILED = "failed"
+STATES = (PENDING, IN_FLIGHT, DONE, FAILED)
+
+DEFAULT_CAPACITY = 1_000_000  # URLs the Bloom filter is sized for
+DEFAULT_ERROR_RATE = 0.01
+CLAIM_BATCH = 100  # Rows moved to in_flight per dequeue query
+COMMIT_EVERY = 200  # State updates buffered before they are written in one short transaction
+COMMIT_SECONDS = 2.0  # ... or after this long, so the database never lags far behind
+MAX_LEASES = 3  # A URL whose lease expired this often is marked failed instead of handed out again
+BUSY_TIMEOUT = 60  # Seconds to wait for another process's write transaction
+SHARD_COLUMNS = {"host": "host_hash", "url": "id"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL UNIQUE,
+    host_hash INTEGER NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    depth INTEGER NOT NULL DEFAULT 0,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_until REAL,
+    status_code INTEGER,
+    error TEXT,
+    updated REAL
+);
+"""
+INDEX_SCHEMA = "CREATE INDEX IF NOT EXISTS urls_state ON urls (state, priority DESC, id)"
+# Columns added after the first frontier files were written, with the definition that adds them
+ADDED_COLUMNS = {
+    "host_hash": "INTEGER NOT NULL DEFAULT 0",
+    "priority": "INTEGER NOT NULL DEFAULT 0",
+    "depth": "INTEGER NOT NULL DEFAULT 0",
+    "lease_owner": "TEXT",
+    "lease_until": "REAL",
+}
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (false positives possible, false negatives never)"""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, error_rate: float = DEFAULT_ERROR_RATE):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+def host_hash(url: str) -> int:
+    """Stable hash of the URL's host; rows with equal host_hash % shards form one shard"""
+    return zlib.crc32(urlparse(url).netloc.lower().encode("utf-8"))
+
+
+class Frontier:
+    def __init__(self, path: str, capacity: int = DEFAULT_CAPACITY, error_rate: float = DEFAULT_ERROR_RATE,
+                 reset: bool = False, owner: Optional[str] = None):
+        """
+        Args:
+            path: SQLite file (created if missing)
+            capacity: Expected number of URLs, sizes the Bloom filter (more only raises its error rate)
+            error_rate: Bloom filter false-positive rate at capacity
+            reset: Start empty instead of continuing the crawl stored in path
+            owner: Name the rows this instance dequeues are leased to (default host:pid)
+        """
+        self.path = path
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        if reset:
+            self.conn.execute("DROP TABLE IF EXISTS urls")  # Faster than deleting every row
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+        self.bloom: Optional[BloomFilter] = None  # Built on first use; workers that only dequeue never need it
+        self.marks: List[tuple] = []
+        self.last_flush = time.monotonic()
+        # Called before buffered marks are committed, e.g. the journal's flush, so a URL is never
+        # done here while its result is still only in the journal's buffer
+        self.before_commit: Optional[Callable[[], None]] = None
+
+    # ---------- membership ----------
+    def _filter(self) -> BloomFilter:
+        if self.bloom is None:
+            self.bloom = BloomFilter(self.capacity, self.error_rate)
+            for (url,) in self.conn.execute("SELECT url FROM urls"):
+                self.bloom.add(url)
+        return self.bloom
+
+    def _exists(self, url: str) -> bool:
+        return self.conn.execute("SELECT 1 FROM urls WHERE url = ?", (url,)).fetchone() is not None
+
+    def __contains__(self, url: str) -> bool:
+        with self.lock:
+            return url in self._filter() and self._exists(url)
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+
+    def depth_of(self, url: str) -> Optional[int]:
+        """Link depth the URL was queued at (0 = seed / sitemap), None if unknown"""
+        with self.lock:
+            row = self.conn.execute("SELECT depth FROM urls WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def _migrate(self):
+        """Bring a frontier file from an older version up to SCHEMA, then (re)build the dequeue index"""
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(urls)")}
+        with self.conn:
+            for column, definition in ADDED_COLUMNS.items():
+                if column not in columns:
+                    self.conn.execute(f"ALTER TABLE urls ADD COLUMN {column} {definition}")
+            if "host_hash" not in columns:
+                rows = self.conn.execute("SELECT id, url FROM urls").fetchall()
+                self.conn.executemany("UPDATE urls SET host_hash = ? WHERE id = ?",
+                                      [(host_hash(url), row_id) for row_id, url in rows])
+            indexed = [row[2] for row in self.conn.execute("PRAGMA index_info(urls_state)")]
+            if indexed and "priority" not in indexed:  # Built as (state, id) before priorities existed
+                self.conn.execute("DROP INDEX urls_state")
+            self.conn.execute(INDEX_SCHEMA)
+
+    def _add(self, url: str, priority: int, depth: int, now: float) -> bool:
+        bloom = self._filter()
+        if url in bloom and self._exists(url):
+            return False
+        cur = self.conn.execute("INSERT OR IGNORE INTO urls (url, host_hash, priority, depth, updated) "
+                                "VALUES (?, ?, ?, ?, ?)", (url, host_hash(url), priority, depth, now))
+        bloom.add(url)
+        return cur.rowcount == 1  # 0 if another process added it since this one's filter was built
+
+    def add(self, url: str, priority: int = 0) -> bool:
+        """Queue the URL as pending; returns False if it was already in the frontier"""
+        return bool(self.add_many([url], lambda _: priority))
+
+    def add_many(self, urls: Iterable[str], priority: Optional[Callable[[str], int]] = None, depth: int = 0,
+                 limit: Optional[int] = None) -> List[str]:
+        """
+        Queue every unseen URL in one transaction (priority(url) -> higher is fetched first); returns the new ones
+
+        Args:
+            depth: Link depth stored with the new URLs
+            limit: Stop after this many new URLs
+        """
+        now = time.time()
+        added = []
+        with self.lock:
+            for url in urls:
+                if limit is not None and len(added) >= limit:
+                    break
+                if self._add(url, priority(url) if priority else 0, depth, now):
+                    added.append(url)
+            self.conn.commit()
+        return added
+
+    # ---------- queue ----------
+    @staticmethod
+    def _shard_filter(shard: Optional[int], shards: int, shard_by: str) -> tuple:
+        if shard is None:
+            return "", ()
+        if shard_by not in SHARD_COLUMNS:
+            raise ValueError(f"Unknown shard_by: {shard_by}")
+        return f" AND {SHARD_COLUMNS[shard_by]} % ? = ?", (shards, shard)
+
+    def claim(self, n: int = CLAIM_BATCH, shard: Optional[int] = None, shards: int = 1,
+              ttl: Optional[float] = None, shard_by: str = "host") -> List[str]:
+        """
+        Lease up to n pending URLs, highest priority then oldest first, to this instance (state in_flight)
+
+        Args:
+            shard, shards: Only take URLs of shard number `shard` out of `shards`
+            ttl: Seconds after which reclaim_expired() may hand the URLs to someone else
+            shard_by: "host" (a host's URLs all land in one shard) or "url" (round-robin)
+        """
+        where, params = self._shard_filter(shard, shards, shard_by)
+        now = time.time()
+        with self.lock:
+            self._flush_locked()
+            # IMMEDIATE takes the write lock up front, so no other process can lease the same rows
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self.conn.execute(f"SELECT id, url FROM urls WHERE state = ?{where} ORDER BY priority DESC, id LIMIT ?",
+                                         (PENDING, *params, n)).fetchall()
+                self.conn.executemany(
+                    "UPDATE urls SET state = ?, attempts = attempts + 1, lease_owner = ?, lease_until = ?, "
+                    "updated = ? WHERE id = ?",
+                    [(IN_FLIGHT, self.owner, now + ttl if ttl else None, now, row_id) for row_id, _ in rows])
+                self.conn.commit()
+            except BaseException:
+                self.conn.rollback()
+                raise
+        return [url for _, url in rows]
+
+    def iter_pending(self, batch: int = CLAIM_BATCH, shard: Optional[int] = None, shards: int = 1,
+                     ttl: Optional[float] = None, shard_by: str = "host", limit: Optional[int] = None) -> Iterator[str]:
+        """
+        Yield pending URLs (of one shard) until none are left or limit URLs were yielded, leasing them
+        a batch at a time; leased URLs not yet yielded go back to pending if the generator is closed early
+        """
+        handed = 0
+        urls: List[str] = []
+        i = 0
+        try:
+            while limit is None or handed < limit:
+                urls = self.claim(batch if limit is None else min(batch, limit - handed), shard, shards, ttl, shard_by)
+                if not urls:
+                    return
+                for i, url in enumerate(urls, 1):
+                    handed += 1
+                    yield url
+        finally:
+            if i < len(urls):
+                self.unclaim(urls[i:])
+
+    def unclaim(self, urls: List[str]) -> int:
+        """Put URLs this instance leased but never started back to pending; returns how many"""
+        with self.lock:
+            cur = self.conn.executemany(
+                "UPDATE urls SET state = ?, attempts = attempts - 1, lease_owner = NULL, lease_until = NULL "
+                "WHERE url = ? AND state = ? AND lease_owner = ?", [(PENDING, url, IN_FLIGHT, self.owner) for url in urls])
+            self.conn.commit()
+        return cur.rowcount
+
+    def _flush_locked(self):
+        if self.marks:
+            if self.before_commit is not None:
+                self.before_commit()
+            self.conn.executemany("UPDATE urls SET state = ?, status_code = ?, error = ?, lease_owner = NULL, "
+                                  "lease_until = NULL, updated = ? WHERE url = ?", self.marks)
+            self.marks = []
+        self.conn.commit()
+        self.last_flush = time.monotonic()
+
+    def flush(self):
+        with self.lock:
+            self._flush_locked()
+
+    def mark(self, url: str, state: str, status_code: Optional[int] = None, error: Optional[str] = None):
+        with self.lock:
+            self.marks.append((state, status_code, error, time.time(), url))
+            if len(self.marks) >= COMMIT_EVERY or time.monotonic() - self.last_flush >= COMMIT_SECONDS:
+                self._flush_locked()
+
+    def record(self, result: Dict):
+        """Result sink: a scrape result marks its URL done or failed"""
+        state = DONE if result.get("error") is None else FAILED
+        self.mark(result["url"], state, result.get("status_code"), result.get("error"))
+
+    def requeue(self, failed: bool = True) -> int:
+        """Hand out in_flight (and optionally failed) URLs again; returns how many"""
+        states = (IN_FLIGHT, FAILED) if failed else (IN_FLIGHT,)
+        with self.lock:
+            self._flush_locked()
+            cur = self.conn.execute(
+                f"UPDATE urls SET state = ?, lease_owner = NULL, lease_until = NULL "
+                f"WHERE state IN ({', '.join('?' * len(states))})",
+                (PENDING, *states))
+            self.conn.commit()
+        return cur.rowcount
+
+    def release(self, owner_prefix: str) -> int:
+        """Put the in_flight URLs leased to owners starting with owner_prefix back to pending; returns how many"""
+        with self.lock:
+            self._flush_locked()
+            cur = self.conn.execute(
+                "UPDATE urls SET state = ?, lease_owner = NULL, lease_until = NULL "
+                # Plain prefix compare: hostnames may hold "_" / "%", which LIKE would treat as wildcards
+                "WHERE state = ? AND substr(lease_owner, 1, ?) = ?",
+                (PENDING, IN_FLIGHT, len(owner_prefix), owner_prefix))
+            self.conn.commit()
+        return cur.rowcount
+
+    def reclaim_expired(self, max_leases: int = MAX_LEASES) -> int:
+        """Hand out URLs whose lease ran out again (or fail them after max_leases); returns how many"""
+        now = time.time()
+        expired = "state = ? AND lease_until IS NOT NULL AND lease_until < ?"
+        with self.lock:
+            self.conn.execute(
+                f"UPDATE urls SET state = ?, error = 'lease expired {max_leases} times', lease_owner = NULL, "
+                f"lease_until = NULL, updated = ? WHERE {expired} AND attempts >= ?",
+                (FAILED, now, IN_FLIGHT, now, max_leases))
+            cur = self.conn.execute(
+                f"UPDATE urls SET state = ?, lease_owner = NULL, lease_until = NULL, updated = ? WHERE {expired}",
+                (PENDING, now, IN_FLIGHT, now))
+            self.conn.commit()
+        return cur.rowcount
+
+    # ---------- inspection ----------
+    def counts(self) -> Dict[str, int]:
+        with self.lock:
+            self._flush_locked()
+            counts = dict(self.conn.execute("SELECT state, COUNT(*) FROM urls GROUP BY state"))
+        return {state: counts.get(state, 0) for state in STATES}
+
+    def iter_urls(self, order: str = "id") -> Iterator[str]:
+        """Every URL in discovery order ("id") or sorted ("url"), streamed from disk"""
+        if order not in ("id", "url"):
+            raise ValueError(f"Unknown order: {order}")
+        # A separate connection so the cursor is not disturbed by concurrent writes
+        conn = sqlite3.connect(self.path)
+        try:
+            for (url,) in conn.execute(f"SELECT url FROM urls ORDER BY {order}"):
+                yield url
+        finally:
+            conn.close()
+
+    def print_summary(self):
+        counts = self.counts()
+        print(f"[FRONTIER] {sum(counts.values())} URLs in {self.path}: "
+              + ", ".join(f"{state} {n}" for state, n in counts.items()))
+
+    def close(self):
+        """Commit, and put URLs this instance leased but never finished back to pending"""
+        self.release(self.owner)
+        self.print_summary()
+        self.conn.close()
@@ -0,0 +1,95 @@
+"""
+http_cache.py
+
+Persistent validator cache for conditional GETs.
+
+- Remembers ETag / Last-Modified per URL together with where its body was saved.
+- headers_for() returns If-None-Match / If-Modified-Since only while that saved body
+  still exists, so a 304 can always be answered from disk.
+- Saved as JSON (atomic replace) so validators survive between runs.
+"""
+
+import os
+import json
+import threading
+from typing import Dict, Optional
+
+VALIDATOR_CACHE_FILE = "validator_cache.json"
+
+
+class ValidatorCache:
+    def __init__(self, path: str = VALIDATOR_CACHE_FILE):
+        self.path = path
+        self.entries: Dict[str, Dict] = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+            print(f"[cache] Loaded validators for {len(self.entries)} URLs from {self.path}")
+        except Exception as e:
+            print(f"[cache] Ignoring unreadable cache {self.path}: {e}")
+            self.entries = {}
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with self.lock:
+            data = dict(self.entries)
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=1)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"[cache] Failed to save {self.path}: {e}")
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Cache entry for the URL, or None if missing or its saved body is gone"""
+        with self.lock:
+            entry = self.entries.get(url)
+        if not entry or not entry.get("path") or not os.path.exists(entry["path"]):
+            return None
+        return entry
+
+    def headers_for(self, url: str) -> Dict[str, str]:
+        """Conditional request headers for the URL ({} when there is nothing to revalidate)"""
+        entry = self.get(url)
+        if entry is None:
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def update(self, url: str, response_headers, path: str, content_length: int):
+        """Store validators from a 200 response and where its body was written"""
+        etag = response_headers.get("ETag")
+        last_modified = response_headers.get("Last-Modified")
+        with self.lock:
+            if not etag and not last_modified:
+                # Nothing to revalidate with next time
+                self.entries.pop(url, None)
+                return
+            self.entries[url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "path": path,
+                "content_length": content_length,
+            }
+
+    def touch(self, url: str, response_headers) -> Dict:
+        """Record a 304: refresh validators if the server sent new ones and return the entry"""
+        with self.lock:
+            self.hits += 1
+            entry = self.entries[url]
+            if response_headers.get("ETag"):
+                entry["etag"] = response_headers["ETag"]
+            if response_headers.get("Last-Modified"):
+                entry["last_modified"] = response_headers["Last-Modified"]
+            return dict(entry)
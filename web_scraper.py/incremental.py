@@ -0,0 +1,66 @@
+"""
+incremental.py
+
+Sitemap <lastmod>-driven incremental recrawl.
+
+- sitemap_lastmod.json keeps, per URL, the <lastmod> that was current when the page
+  was last fetched successfully.
+- A URL is scheduled again only if it is new, has no <lastmod>, its <lastmod> changed,
+  or its saved copy is missing.
+- Failed pages are never recorded, so they are retried on the next run.
+"""
+
+import os
+import json
+from typing import Callable, Dict, List, Tuple
+
+SITEMAP_STATE_FILE = "sitemap_lastmod.json"
+
+
+def load_state(path: str = SITEMAP_STATE_FILE) -> Dict[str, str]:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"[incremental] Ignoring unreadable state {path}: {e}")
+        return {}
+
+
+def save_state(state: Dict[str, str], path: str = SITEMAP_STATE_FILE):
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=1)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"[incremental] Failed to save {path}: {e}")
+
+
+def select_changed_urls(urls: List[str], meta: Dict[str, Dict], state: Dict[str, str],
+                        is_saved: Callable[[str], bool]) -> Tuple[List[str], List[str]]:
+    """
+    Split URLs into (to_crawl, skipped) by comparing sitemap <lastmod> with the last run
+
+    Args:
+        urls: URLs found in the sitemap, in sitemap order
+        meta: url -> {"lastmod", "changefreq", "priority"} from this run's sitemap
+        state: url -> lastmod recorded at the last successful fetch
+        is_saved: Returns True if the URL's page is still on disk
+    """
+    to_crawl, skipped = [], []
+    for url in urls:
+        lastmod = meta.get(url, {}).get("lastmod")
+        if lastmod and state.get(url) == lastmod and is_saved(url):
+            skipped.append(url)
+        else:
+            to_crawl.append(url)
+    return to_crawl, skipped
+
+
+def record_result(state: Dict[str, str], meta: Dict[str, Dict], result: Dict):
+    """Remember the current <lastmod> of a page if it was fetched successfully"""
+    lastmod = meta.get(result["url"], {}).get("lastmod")
+    if result.get("error") is None and lastmod:
+        state[result["url"]] = lastmod
@@ -0,0 +1,99 @@
+"""
+latency.py
+
+Per-host response-time tracking for adaptive timeouts and hedged requests.
+
+- Keeps the last `window` response times (time to response headers) for each host.
+- timeout_for() returns the host's p99 times a safety multiplier, kept between a floor and
+  the fixed REQUEST_TIMEOUT ceiling; until enough samples exist the ceiling is used.
+- A URL that timed out once gets the full ceiling on later attempts, so genuinely slow
+  pages still get through on retry.
+- hedge_delay() is the host's p95: a request still waiting after that long is an outlier
+  worth racing with a duplicate.
+"""
+
+import math
+import threading
+from collections import deque
+from urllib.parse import urlparse
+from typing import Deque, Dict, Optional, Set
+
+
+class LatencyTracker:
+    def __init__(self, max_timeout: float, min_timeout: float = 3.0, multiplier: float = 3.0,
+                 window: int = 200, min_samples: int = 20):
+        """
+        Args:
+            max_timeout: Ceiling, also used before a host has min_samples responses
+            min_timeout: Adaptive timeouts never go below this
+            multiplier: Timeout = p99 * multiplier
+            window: Response times kept per host
+            min_samples: Responses needed before percentiles are trusted
+        """
+        self.max_timeout = max_timeout
+        self.min_timeout = min_timeout
+        self.multiplier = multiplier
+        self.window = window
+        self.min_samples = min_samples
+        self.samples: Dict[str, Deque[float]] = {}
+        self.slow_urls: Set[str] = set()
+        self.lock = threading.Lock()
+        self.hedges_sent = 0
+        self.hedges_won = 0
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        return urlparse(url).netloc.lower()
+
+    def record(self, url: str, seconds: float):
+        host = self.host_of(url)
+        with self.lock:
+            samples = self.samples.get(host)
+            if samples is None:
+                samples = self.samples[host] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def timed_out(self, url: str):
+        """Remember that the URL hit its adaptive timeout; it gets the ceiling from now on"""
+        with self.lock:
+            self.slow_urls.add(url)
+
+    def percentile(self, url: str, q: float) -> Optional[float]:
+        """q-th percentile (0-100) of the URL's host response times, or None with too few samples"""
+        with self.lock:
+            samples = self.samples.get(self.host_of(url))
+            if samples is None or len(samples) < self.min_samples:
+                return None
+            ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1)]
+
+    def timeout_for(self, url: str) -> float:
+        with self.lock:
+            if url in self.slow_urls:
+                return self.max_timeout
+        p99 = self.percentile(url, 99)
+        if p99 is None:
+            return self.max_timeout
+        return min(self.max_timeout, max(self.min_timeout, p99 * self.multiplier))
+
+    def hedge_delay(self, url: str) -> Optional[float]:
+        """Seconds after which a still-pending request to the URL's host gets a hedge, or None"""
+        return self.percentile(url, 95)
+
+    def count_hedge(self, won: bool):
+        with self.lock:
+            self.hedges_sent += 1
+            self.hedges_won += int(won)
+
+    def print_summary(self):
+        with self.lock:
+            hosts = list(self.samples)
+        for host in hosts:
+            url = f"//{host}"
+            p50, p95, p99 = (self.percentile(url, q) for q in (50, 95, 99))
+            if p50 is None:
+                continue
+            print(f"[LATENCY] {host}: p50={p50:.2f}s p95={p95:.2f}s p99={p99:.2f}s "
+                  f"-> timeout {self.timeout_for(url):.1f}s")
+        if self.hedges_sent:
+            print(f"[LATENCY] Hedged requests: {self.hedges_sent} sent, {self.hedges_won} beat the original")
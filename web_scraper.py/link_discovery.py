@@ -0,0 +1,120 @@
+"""
+link_discovery.py
+
+Breadth-first link crawl for sites whose sitemap is missing, stale or blocked.
+
+- Links are pulled out of each page's bytes while they stream to storage (a regex over
+  <a>/<area> href attributes), so pages are not read or parsed a second time.
+- Only links inside the crawl scope (by default the start page's folder, e.g.
+  https://www.dove.com/us/en/) are followed; fragments are dropped and obvious
+  non-page files (.pdf, images, ...) are never queued.
+- robots.txt is fetched and parsed once per host (RobotsCache); disallowed links are not queued.
+- New links go into the frontier one level deeper than the page they were found on, up to
+  max_depth, and no more than max_pages URLs are queued in total. The frontier's Bloom
+  filter answers "seen before?" for every link without a database lookup.
+"""
+
+import re
+import html
+import threading
+from urllib.parse import urldefrag, urljoin, urlparse
+from typing import Iterable, List, Optional
+
+LINK_RE = re.compile(rb"""<(?:a|area)\s[^>]*?\bhref\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""", re.IGNORECASE)
+MAX_TAG_BYTES = 8 * 1024  # A tag cut in two by a chunk boundary is kept up to this long
+SKIP_EXTENSIONS = (".pdf", ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".ico", ".css", ".js", ".json",
+                   ".xml", ".zip", ".mp3", ".mp4", ".webm", ".woff", ".woff2", ".ttf", ".doc", ".docx", ".xls", ".xlsx")
+
+
+def default_scope(start_url: str) -> str:
+    """The start page's folder: https://www.dove.com/us/en/home.html -> https://www.dove.com/us/en/"""
+    parsed = urlparse(start_url)
+    folder = parsed.path.rsplit("/", 1)[0] + "/"
+    return f"{parsed.scheme}://{parsed.netloc.lower()}{folder}"
+
+
+class LinkCollector:
+    """Collects the href values of one page body fed to it chunk by chunk"""
+
+    def __init__(self):
+        self.tail = b""  # Unfinished tag at the end of the previous chunk
+        self.hrefs: List[bytes] = []
+
+    def _scan(self, data: bytes):
+        for match in LINK_RE.finditer(data):
+            self.hrefs.append(match.group(1) or match.group(2) or match.group(3) or b"")
+
+    def feed(self, chunk: bytes):
+        data = self.tail + chunk
+        cut = data.rfind(b"<")
+        if cut < 0 or data.find(b">", cut) >= 0:
+            cut = len(data)  # Ends on a complete tag
+        self._scan(data[:cut])
+        self.tail = data[cut:] if len(data) - cut <= MAX_TAG_BYTES else b""
+
+    def links(self) -> List[str]:
+        """Raw href values found (finishing the scan of the last chunk)"""
+        self._scan(self.tail)
+        self.tail = b""
+        return [html.unescape(href.decode("utf-8", "replace")).strip() for href in self.hrefs]
+
+
+class LinkDiscovery:
+    def __init__(self, frontier, scope: str, robots=None, max_depth: int = 3, max_pages: int = 10_000,
+                 priority=None):
+        """
+        Args:
+            frontier: Frontier the discovered URLs are queued in
+            scope: Only URLs starting with this prefix are followed
+            robots: RobotsCache consulted before a URL is queued (None = no robots.txt check)
+            max_depth: Links are followed this many clicks away from the seed pages
+            max_pages: Stop queueing once the frontier holds this many URLs (per process)
+            priority: Optional priority(url) -> int for the new URLs
+        """
+        self.frontier = frontier
+        self.scope = scope
+        self.robots = robots
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.priority = priority
+        self.lock = threading.Lock()
+        self.queued = len(frontier)
+        self.found_links = 0
+        self.new_urls = 0
+        self.disallowed = 0
+
+    def normalize(self, page_url: str, href: str) -> Optional[str]:
+        """Absolute in-scope page URL for a link, or None if it is not followed"""
+        url, _ = urldefrag(urljoin(page_url, href))
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https"):
+            return None
+        url = parsed._replace(netloc=parsed.netloc.lower()).geturl()
+        if not url.startswith(self.scope) or parsed.path.lower().endswith(SKIP_EXTENSIONS):
+            return None
+        return url
+
+    def found(self, page_url: str, hrefs: Iterable[str], depth: Optional[int] = None) -> int:
+        """Queue the in-scope links of a fetched page one level below it; returns how many were new"""
+        if depth is None:
+            depth = self.frontier.depth_of(page_url)
+        if depth is None or depth >= self.max_depth:
+            return 0
+        urls = dict.fromkeys(self.normalize(page_url, href) for href in hrefs)  # Page order, deduplicated
+        urls.pop(None, None)
+        allowed = [url for url in urls if self.robots is None or self.robots.can_fetch(url)]
+        with self.lock:
+            self.found_links += len(urls)
+            self.disallowed += len(urls) - len(allowed)
+            room = self.max_pages - self.queued
+            if room <= 0:
+                return 0
+            added = len(self.frontier.add_many(allowed, self.priority, depth + 1, limit=room))
+            self.queued += added
+            self.new_urls += added
+        return added
+
+    def print_summary(self):
+        print(f"[DISCOVERY] {self.found_links:,} in-scope links seen, {self.new_urls:,} new URLs queued "
+              f"(depth limit {self.max_depth}, {self.disallowed:,} disallowed by robots.txt"
+              f"{', page limit reached' if self.queued >= self.max_pages else ''})")
@@ -0,0 +1,112 @@
+"""
+multi_brand.py
+
+Crawl several brand sites in one job.
+
+- Every brand runs in its own worker process, working inside its own folder
+  (brands/<brand>/), so its urls.txt, caches, journal, snapshots and Excel report
+  never mix with another brand's and one slow or huge site cannot starve the rest.
+- Each process keeps its own per-host governor and thread pool, so every domain gets
+  the same fetch budget no matter how many pages the other sites have.
+- Each brand's console output goes to brands/<brand>/crawl.log; the parent prints one
+  line per finished brand and writes brand_stats.json.
+- Given a metrics_port, every brand gets its own block of ports_per_brand ports for its
+  live metrics (and its workers'), so no two brand processes try to bind the same one.
+"""
+
+import os
+import sys
+import json
+import time
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from urllib.parse import urlparse
+from typing import Callable, Dict, Optional
+
+BRAND_STATS_FILE = "brand_stats.json"
+LOG_FILE = "crawl.log"
+
+
+def brand_dir_name(home_url: str) -> str:
+    """Folder name for a brand, e.g. www.rexona.com_br for https://www.rexona.com/br/home.html"""
+    parsed = urlparse(home_url)
+    path = parsed.path.rsplit("/", 1)[0] if parsed.path.endswith(".html") else parsed.path
+    parts = [parsed.netloc.lower()] + [p for p in path.split("/") if p]
+    return "_".join(parts).replace(":", "_")
+
+
+def _crawl_brand(crawl_fn: Callable, home_url: str, sitemap_url: str, brand_dir: str, resume: bool,
+                 metrics_port: Optional[int]) -> Dict:
+    """Worker process: run one brand's crawl inside its folder with output going to crawl.log"""
+    os.makedirs(brand_dir, exist_ok=True)
+    os.chdir(brand_dir)
+    start_time = time.time()
+    with open(LOG_FILE, "a" if resume else "w", encoding="utf-8", buffering=1) as log, redirect_stdout(log):
+        stderr = sys.stderr
+        sys.stderr = log
+        try:
+            stats = crawl_fn(sitemap_url, resume=resume, start_url=home_url, metrics_port=metrics_port)
+        finally:
+            sys.stderr = stderr
+    stats["elapsed_seconds"] = round(time.time() - start_time, 2)
+    return stats
+
+
+def crawl_all_brands(brands: Dict[str, str], crawl_fn: Callable, output_root: str,
+                     resume: bool = False, max_parallel: Optional[int] = None,
+                     metrics_port: Optional[int] = None, ports_per_brand: int = 1) -> Dict[str, Dict]:
+    """
+    Crawl every brand concurrently
+
+    Args:
+        brands: home URL -> sitemap URL (url_sitemap_dict)
+        crawl_fn: crawl_fn(sitemap_url, resume=..., start_url=home_url, metrics_port=...) crawls
+            one site into the current directory and returns its stats dict
+        output_root: Parent folder of the per-brand folders
+        resume: Passed on to every brand's crawl
+        max_parallel: Brands crawled at the same time (None = all)
+        metrics_port: First brand's metrics port; brand i gets metrics_port + i * ports_per_brand
+            (None = no live endpoints)
+        ports_per_brand: Ports one brand's crawl uses (1 + its worker processes)
+    """
+    os.makedirs(output_root, exist_ok=True)
+    root = os.path.abspath(output_root)
+    workers = max_parallel or len(brands)
+    stats: Dict[str, Dict] = {}
+
+    print(f"[BRANDS] Crawling {len(brands)} brands, {workers} at a time, into {output_root}/")
+    start_time = time.time()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        future_to_brand = {}
+        for index, (home_url, sitemap_url) in enumerate(brands.items()):
+            name = brand_dir_name(home_url)
+            port = metrics_port + index * ports_per_brand if metrics_port else None
+            future = executor.submit(_crawl_brand, crawl_fn, home_url, sitemap_url, os.path.join(root, name),
+                                     resume, port)
+            future_to_brand[future] = name
+
+        for future in as_completed(future_to_brand):
+            name = future_to_brand[future]
+            try:
+                brand_stats = future.result()
+            except Exception as e:
+                brand_stats = {"error": str(e)}
+                print(f"[BRANDS] ❌ {name}: {e} (see {output_root}/{name}/{LOG_FILE})")
+            else:
+                print(f"[BRANDS] ✓ {name}: {brand_stats['successful']}/{brand_stats['total']} pages OK, "
+                      f"{brand_stats['failed']} failed, {brand_stats['content_bytes']:,} bytes "
+                      f"in {brand_stats['elapsed_seconds']:.1f}s")
+            stats[name] = brand_stats
+
+    elapsed_time = time.time() - start_time
+    brand_time = sum(s.get("elapsed_seconds", 0) for s in stats.values())
+    print(f"[BRANDS] Done in {elapsed_time:.1f}s wall time ({brand_time:.1f}s if crawled one after another)")
+
+    stats_path = os.path.join(output_root, BRAND_STATS_FILE)
+    try:
+        with open(stats_path, "w", encoding="utf-8") as f:
+            json.dump({"wall_seconds": round(elapsed_time, 2), "brands": stats}, f, indent=4)
+        print(f"[SAVED] Per-brand stats to {stats_path}")
+    except Exception as e:
+        print(f"[ERROR] Failed saving {stats_path}: {e}")
+    return stats
@@ -0,0 +1,48 @@
+"""
+priority.py
+
+Fetch order by page class instead of sitemap order.
+
+- A URL's priority is the value of the first URL rule whose regex matches it, plus the
+  value of the first sitemap rule matching the sitemap it was listed in (0 if none match).
+- Higher priorities are fetched first; equal priorities keep their sitemap order.
+- E.g. product pages (/p/, products-product-page-sitemap) first, campaigns and stories
+  last, so the pages that matter for an audit are on disk early in a long crawl.
+"""
+
+import re
+from collections import Counter
+from typing import Callable, Iterable, List, Optional, Tuple
+
+Rule = Tuple[str, int]  # (regex, priority)
+
+
+class PriorityRules:
+    def __init__(self, url_rules: Iterable[Rule] = (), sitemap_rules: Iterable[Rule] = ()):
+        """
+        Args:
+            url_rules: (regex, priority) matched against the page URL, first match wins
+            sitemap_rules: (regex, priority) matched against the URL's source sitemap, first match wins
+        """
+        self.url_rules = [(re.compile(pattern), value) for pattern, value in url_rules]
+        self.sitemap_rules = [(re.compile(pattern), value) for pattern, value in sitemap_rules]
+
+    @staticmethod
+    def _first_match(rules, text: Optional[str]) -> int:
+        if text:
+            for pattern, value in rules:
+                if pattern.search(text):
+                    return value
+        return 0
+
+    def priority(self, url: str, sitemap: Optional[str] = None) -> int:
+        return self._first_match(self.url_rules, url) + self._first_match(self.sitemap_rules, sitemap)
+
+    def order(self, urls: Iterable[str], sitemap_of: Callable[[str], Optional[str]]) -> List[str]:
+        """The URLs highest priority first (stable, so sitemap order is kept within a priority)"""
+        return sorted(urls, key=lambda url: -self.priority(url, sitemap_of(url)))
+
+    def print_summary(self, urls: Iterable[str], sitemap_of: Callable[[str], Optional[str]]):
+        levels = Counter(self.priority(url, sitemap_of(url)) for url in urls)
+        print("[PRIORITY] URLs per priority (fetched highest first): "
+              + ", ".join(f"{value}: {count}" for value, count in sorted(levels.items(), reverse=True)))
@@ -0,0 +1,91 @@
+"""
+render_detect.py
+
+Decides from a plain HTTP response whether a page needs a real browser.
+
+- Bot-check statuses (401/403) and known challenge pages (Cloudflare, Akamai, Imperva,
+  PerimeterX, DataDome) need JS to get through. 429 / 503 are throttling, not a challenge:
+  they are left to the retry scheduler and its Retry-After backoff.
+- An HTML page whose <main> is empty, or a bare JS app shell, needs JS to fill in.
+- A sitemap request that comes back as HTML instead of XML is a challenge as well.
+- Anything else (including 404 / 500) is left alone: a browser would get the same answer.
+
+Only the first SNIFF_BYTES of the body are looked at.
+"""
+
+import re
+from typing import Optional
+
+SNIFF_BYTES = 256 * 1024
+CHALLENGE_STATUS_CODES = {401, 403}
+MIN_MAIN_TEXT = 40  # Characters of visible text below which <main> counts as empty
+
+CHALLENGE_MARKERS = (
+    b"cf-chl",
+    b"challenge-platform",
+    b"<title>just a moment",
+    b"_incapsula_resource",
+    b"pardon our interruption",
+    b"px-captcha",
+    b"captcha-delivery.com",
+    b"/_sec/cp_challenge",
+    b"enable javascript and cookies to continue",
+)
+JS_REQUIRED_MARKERS = (
+    b"you need to enable javascript",
+    b"please enable javascript",
+    b"requires javascript",
+)
+APP_SHELL_RE = re.compile(rb'<div[^>]+id=["\'](?:root|app|__next)["\'][^>]*>\s*</div>', re.IGNORECASE)
+MAIN_RE = re.compile(rb"<main\b[^>]*>(.*?)</main>", re.IGNORECASE | re.DOTALL)
+SCRIPT_STYLE_RE = re.compile(rb"<(script|style|noscript|template)\b.*?</\1>", re.IGNORECASE | re.DOTALL)
+TAG_RE = re.compile(rb"<[^>]+>")
+BODY_RE = re.compile(rb"<body\b[^>]*>(.*)", re.IGNORECASE | re.DOTALL)
+
+
+def visible_text_length(html: bytes) -> int:
+    text = TAG_RE.sub(b" ", SCRIPT_STYLE_RE.sub(b" ", html))
+    return len(b" ".join(text.split()))
+
+
+def is_challenge(body: bytes) -> bool:
+    """Whether the start of a page is a known bot-check / challenge page"""
+    head = body[:SNIFF_BYTES].lower()
+    return any(marker in head for marker in CHALLENGE_MARKERS)
+
+
+def render_reason(status_code: Optional[int], body: bytes = b"", expect: str = "html") -> Optional[str]:
+    """
+    Why the response should be re-fetched in a browser, or None if it is fine as is
+
+    Args:
+        status_code: HTTP status of the plain request
+        body: Start of the response body (up to SNIFF_BYTES)
+        expect: "html" for pages, "xml" for sitemaps
+    """
+    head = body[:SNIFF_BYTES].lower()
+    if status_code in CHALLENGE_STATUS_CODES:
+        return f"status {status_code}"
+    if status_code != 200:
+        return None
+    if is_challenge(head):
+        return "challenge page"
+
+    if expect == "xml":
+        start = head.lstrip()
+        if start[:2] != b"\x1f\x8b" and (start.startswith(b"<!doctype html") or start.startswith(b"<html")):
+            return "HTML instead of sitemap XML"
+        return None
+
+    main = MAIN_RE.search(head)
+    if main is not None:
+        if visible_text_length(main.group(1)) < MIN_MAIN_TEXT:
+            return "empty <main>"
+        return None
+    body_match = BODY_RE.search(head)
+    if body_match is not None:
+        body_html = body_match.group(1)
+        if visible_text_length(body_html) < MIN_MAIN_TEXT and (
+                APP_SHELL_RE.search(body_html) or any(m in head for m in JS_REQUIRED_MARKERS)):
+            return "JS app shell"
+    return None
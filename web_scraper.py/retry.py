@@ -0,0 +1,207 @@
+"""
+retry.py
+
+Deferred retries and per-host circuit breaking for the page scraper.
+
+- A page that failed for a transient reason (timeout, connection error, 408/425/429/5xx)
+  is not retried on the spot: it is queued with an exponential backoff with full jitter
+  and retried in rounds after the main crawl, so healthy pages are never held up.
+- CircuitBreaker opens for a host after several failures in a row. While open, requests
+  to that host fail at once instead of each worker waiting out the full timeout; after
+  the cooldown one probe request is let through and its outcome closes or reopens it.
+- Retry-After on a 429/503 opens the host's circuit for that long, and queued retries
+  for the host are not due before the circuit closes again. The page's own Retry-After
+  (result["retry_after"]) is also a floor for its retry, with or without a breaker.
+"""
+
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+from typing import Callable, Dict, List, Optional
+
+RETRY_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+RETRY_AFTER_STATUS_CODES = {429, 503}
+MAX_RETRY_AFTER = 600.0  # Ignore absurd Retry-After values beyond this
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request to a host whose circuit is open"""
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), or None"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+def is_retriable(result: Dict) -> bool:
+    """True if the page failed in a way another attempt may fix"""
+    if result.get("error") is None:
+        return False
+    status = result.get("status_code")
+    # No status: timeout, connection error or open circuit; < 400: body read failed midway
+    return status is None or status in RETRY_STATUS_CODES or status < 400
+
+
+class HostCircuit:
+    def __init__(self):
+        self.failures = 0  # Consecutive
+        self.open_until = 0.0
+        self.cooldown = 0.0
+        self.probing = False
+        self.trips = 0
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 30.0, max_cooldown: float = 300.0):
+        """
+        Args:
+            failure_threshold: Consecutive failures that open a host's circuit
+            cooldown: Seconds the circuit stays open the first time
+            max_cooldown: Cooldown doubles each time a probe fails, up to this
+        """
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.hosts: Dict[str, HostCircuit] = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        return urlparse(url).netloc.lower()
+
+    def check(self, url: str):
+        """Raise CircuitOpenError unless a request to the URL's host may go out now"""
+        host = self.host_of(url)
+        with self.lock:
+            state = self.hosts.get(host)
+            if state is None or state.open_until == 0.0:
+                return
+            if time.monotonic() < state.open_until or state.probing:
+                raise CircuitOpenError(f"Circuit open for {host}")
+            state.probing = True  # Half-open: this request is the probe
+
+    def record(self, url: str, status_code: Optional[int], retry_after: Optional[str] = None):
+        """Feed back a request's outcome (status_code None = no response at all)"""
+        host = self.host_of(url)
+        failed = status_code is None or status_code in RETRY_STATUS_CODES
+        pause = parse_retry_after(retry_after) if status_code in RETRY_AFTER_STATUS_CODES else None
+        with self.lock:
+            state = self.hosts.setdefault(host, HostCircuit())
+            was_probe = state.probing
+            state.probing = False
+            now = time.monotonic()
+            if not failed:
+                state.failures = 0
+                state.open_until = 0.0
+                state.cooldown = 0.0
+                return
+            state.failures += 1
+            if pause:
+                self._open(host, state, now, pause, f"Retry-After {pause:.0f}s")
+            elif was_probe:
+                state.cooldown = min(self.max_cooldown, max(state.cooldown, self.base_cooldown) * 2)
+                self._open(host, state, now, state.cooldown, "probe failed")
+            elif state.failures >= self.failure_threshold and now >= state.open_until:
+                state.cooldown = self.base_cooldown
+                self._open(host, state, now, state.cooldown, f"{state.failures} failures in a row")
+
+    def _open(self, host: str, state: HostCircuit, now: float, seconds: float, why: str):
+        state.open_until = max(state.open_until, now + seconds)
+        state.trips += 1
+        print(f"[circuit] {host}: paused for {seconds:.0f}s ({why})")
+
+    def retry_at(self, url: str) -> float:
+        """Monotonic time before which the URL's host should not be retried"""
+        with self.lock:
+            state = self.hosts.get(self.host_of(url))
+            return state.open_until if state else 0.0
+
+    def print_summary(self):
+        with self.lock:
+            for host, state in self.hosts.items():
+                if state.trips:
+                    print(f"[CIRCUIT] {host}: opened {state.trips} time(s)")
+
+
+class RetryScheduler:
+    def __init__(self, max_attempts: int = 4, base_delay: float = 1.0, max_delay: float = 60.0,
+                 breaker: Optional[CircuitBreaker] = None):
+        """
+        Args:
+            max_attempts: Total tries per URL, the first one included
+            base_delay: Backoff base in seconds (doubles per attempt)
+            max_delay: Backoff never exceeds this
+            breaker: Optional CircuitBreaker whose pauses retries also wait for
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker
+        self.attempts: Dict[str, int] = {}
+        self.due: Dict[str, float] = {}  # url -> monotonic time its retry may start
+
+    def defer(self, results: Dict[str, Dict]) -> int:
+        """Queue every retriable failure in results; returns how many were queued"""
+        now = time.monotonic()
+        queued = 0
+        for url, result in results.items():
+            attempt = self.attempts.get(url, 0) + 1
+            self.attempts[url] = attempt
+            if attempt >= self.max_attempts or not is_retriable(result):
+                self.due.pop(url, None)
+                continue
+            due = now + max(backoff_delay(attempt, self.base_delay, self.max_delay),
+                            result.get("retry_after") or 0.0)
+            if self.breaker is not None:
+                due = max(due, self.breaker.retry_at(url))
+            self.due[url] = due
+            queued += 1
+        return queued
+
+    def final_attempt(self, url: str) -> bool:
+        """True if the URL's next try is its last one (nothing would be retried after it)"""
+        return self.attempts.get(url, 0) + 1 >= self.max_attempts
+
+    def run(self, results: Dict[str, Dict], crawl: Callable[[List[str]], Dict[str, Dict]]) -> Dict[str, Dict]:
+        """
+        Retry failed pages in rounds until they succeed or run out of attempts
+
+        Args:
+            results: url -> result from the main crawl (updated in place and returned)
+            crawl: Scrapes a list of URLs and returns url -> result
+        """
+        self.defer(results)
+        round_no = 0
+        while self.due:
+            wait = min(self.due.values()) - time.monotonic()
+            if wait > 0:
+                print(f"[RETRY] {len(self.due)} pages queued, next retry in {wait:.1f}s")
+                time.sleep(wait)
+            # Anything due within one backoff base joins this round rather than waiting for its own
+            horizon = time.monotonic() + self.base_delay
+            batch = [url for url, due in self.due.items() if due <= horizon]
+            for url in batch:
+                del self.due[url]
+            round_no += 1
+            print(f"\n[RETRY] Round {round_no}: retrying {len(batch)} failed pages")
+            retried = crawl(batch)
+            results.update(retried)
+            self.defer(retried)
+        return results
@@ -0,0 +1,73 @@
+"""
+robots_cache.py
+
+- Fetches robots.txt once per host and keeps the parsed result in memory.
+- Answers can_fetch() and crawl_delay() for any URL on a cached host.
+- A missing or unreachable robots.txt means "allow everything, no delay".
+"""
+
+import threading
+import requests
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+from typing import Dict, Optional
+
+ROBOTS_TIMEOUT = 10  # seconds
+
+
+class RobotsCache:
+    def __init__(self, user_agent: str = "*", headers: Optional[dict] = None, timeout: float = ROBOTS_TIMEOUT):
+        """
+        Args:
+            user_agent: Agent name matched against robots.txt groups
+            headers: Extra headers sent when fetching robots.txt
+            timeout: Timeout for each robots.txt request
+        """
+        self.user_agent = user_agent
+        self.headers = headers or {}
+        self.timeout = timeout
+        self.parsers: Dict[str, Optional[RobotFileParser]] = {}
+        self.lock = threading.Lock()
+        self.host_locks: Dict[str, threading.Lock] = {}
+
+    def _fetch(self, scheme: str, host: str) -> Optional[RobotFileParser]:
+        robots_url = f"{scheme}://{host}/robots.txt"
+        try:
+            resp = requests.get(robots_url, headers=self.headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            print(f"[robots] Failed to fetch {robots_url}: {e}")
+            return None
+        if resp.status_code != 200:
+            return None
+        parser = RobotFileParser(robots_url)
+        parser.parse(resp.text.splitlines())
+        return parser
+
+    def get(self, url: str) -> Optional[RobotFileParser]:
+        """Return the parsed robots.txt for the URL's host (fetched on first use)"""
+        parsed = urlparse(url)
+        host = parsed.netloc.lower()
+        with self.lock:
+            if host in self.parsers:
+                return self.parsers[host]
+            host_lock = self.host_locks.setdefault(host, threading.Lock())
+        # Only one thread fetches a given host; the others wait for its result
+        with host_lock:
+            with self.lock:
+                if host in self.parsers:
+                    return self.parsers[host]
+            parser = self._fetch(parsed.scheme or "https", host)
+            with self.lock:
+                self.parsers[host] = parser
+        return parser
+
+    def can_fetch(self, url: str) -> bool:
+        parser = self.get(url)
+        return True if parser is None else parser.can_fetch(self.user_agent, url)
+
+    def crawl_delay(self, url: str) -> Optional[float]:
+        parser = self.get(url)
+        if parser is None:
+            return None
+        delay = parser.crawl_delay(self.user_agent)
+        return float(delay) if delay is not None else None
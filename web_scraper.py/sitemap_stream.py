@@ -0,0 +1,173 @@
+"""
+sitemap_stream.py
+
+Streaming sitemap parsing and incremental output writers.
+
+- iter_sitemap() walks a sitemap with ET.iterparse and clears each <url>/<sitemap>
+  element once read, so memory stays flat no matter how many entries there are.
+- .xml.gz sitemaps are detected by their gzip magic bytes and decompressed on the fly.
+- SitemapOutputWriter appends URLs to urls.txt as they are found and checkpoints
+  sitemap.json / sitemap_counts.json while discovery is still running.
+"""
+
+import io
+import os
+import gzip
+import json
+import time
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterator, Optional, Tuple
+
+GZIP_MAGIC = b"\x1f\x8b"
+ENTRY_FIELDS = ("loc", "lastmod", "changefreq", "priority")
+
+
+def local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1].lower()
+
+
+class PrefixedReader(io.RawIOBase):
+    """Readable stream that replays already-consumed bytes before the rest of the source"""
+
+    def __init__(self, prefix: bytes, source):
+        self.prefix = prefix
+        self.source = source
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self.prefix:
+            n = min(len(buffer), len(self.prefix))
+            buffer[:n] = self.prefix[:n]
+            self.prefix = self.prefix[n:]
+            return n
+        data = self.source.read(len(buffer))
+        n = len(data)
+        buffer[:n] = data
+        return n
+
+
+def open_maybe_gzip(fileobj):
+    """Wrap a binary stream so gzip-compressed sitemaps are decompressed transparently"""
+    head = fileobj.read(2)
+    stream = PrefixedReader(head, fileobj)
+    if head == GZIP_MAGIC:
+        return gzip.GzipFile(fileobj=stream)
+    return stream
+
+
+def iter_sitemap(fileobj) -> Iterator[Tuple[str, Optional[Dict[str, str]]]]:
+    """
+    Stream a sitemap or sitemap index
+
+    Yields (kind, None) once for the root element ("urlset" or "sitemapindex"), then
+    (kind, entry) for every <url>/<sitemap>, where entry holds "loc" plus any of
+    "lastmod", "changefreq" and "priority". Raises ET.ParseError on malformed XML.
+    """
+    kind = None
+    root = None
+    for event, elem in ET.iterparse(open_maybe_gzip(fileobj), events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = elem
+                kind = local_name(elem.tag)
+                yield kind, None
+            continue
+
+        name = local_name(elem.tag)
+        if name not in ("url", "sitemap"):
+            continue
+        entry = {}
+        for child in elem:
+            field = local_name(child.tag)
+            if field in ENTRY_FIELDS and child.text and child.text.strip():
+                entry[field] = child.text.strip()
+        # Drop the finished entry and its siblings so the tree never grows
+        elem.clear()
+        root.clear()
+        if entry.get("loc"):
+            yield kind, entry
+
+
+class TeeReader(io.RawIOBase):
+    """Readable stream that copies every byte it reads into a second file"""
+
+    def __init__(self, source, sink):
+        self.source = source
+        self.sink = sink
+        self.bytes_read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self.source.read(len(buffer))
+        n = len(data)
+        buffer[:n] = data
+        self.sink.write(data)
+        self.bytes_read += n
+        return n
+
+    def drain(self, chunk_size: int = 65536):
+        """Read (and copy) whatever the parser left unread"""
+        while self.read(chunk_size):
+            pass
+
+
+class SitemapOutputWriter:
+    def __init__(self, urls_path: str = "urls.txt", structure_path: str = "sitemap.json",
+                 counts_path: str = "sitemap_counts.json", checkpoint_interval: float = 5.0):
+        """
+        Args:
+            urls_path: URLs are appended here (one per line) as soon as they are found
+            structure_path: Nested sitemap structure, checkpointed during the run
+            counts_path: Per-sitemap URL counts, checkpointed during the run
+            checkpoint_interval: Minimum seconds between JSON checkpoints
+        """
+        self.urls_path = urls_path
+        self.structure_path = structure_path
+        self.counts_path = counts_path
+        self.checkpoint_interval = checkpoint_interval
+        self.last_checkpoint = 0.0
+        self.count = 0
+        self.urls_file = open(urls_path, "w", encoding="utf-8")
+
+    def add_urls(self, urls):
+        for u in urls:
+            self.urls_file.write(u + "\n")
+        self.count += len(urls)
+        self.urls_file.flush()
+
+    @staticmethod
+    def _write_json(path: str, data):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4)
+        os.replace(tmp_path, path)
+
+    def checkpoint(self, structure: Dict, counts: Dict, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self.last_checkpoint < self.checkpoint_interval:
+            return
+        self.last_checkpoint = now
+        try:
+            self._write_json(self.structure_path, structure)
+            self._write_json(self.counts_path, counts)
+        except Exception as e:
+            print(f"[ERROR] Failed checkpointing sitemap output: {e}")
+
+    def close(self, structure: Dict, counts: Dict):
+        """Write the final JSON files and close urls.txt"""
+        self.urls_file.close()
+        print(f"[SAVED] {self.count} URLs to {self.urls_path}")
+        try:
+            self._write_json(self.structure_path, structure)
+            print(f"[SAVED] Full structure to {self.structure_path}")
+        except Exception as e:
+            print(f"[ERROR] Failed saving {self.structure_path}: {e}")
+        try:
+            self._write_json(self.counts_path, counts)
+            print(f"[SAVED] Per-sitemap counts to {self.counts_path}")
+        except Exception as e:
+            print(f"[ERROR] Failed saving {self.counts_path}: {e}")
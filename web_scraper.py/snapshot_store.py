@@ -0,0 +1,221 @@
+"""
+snapshot_store.py
+
+Content-addressed, compressed store for scraped HTML pages.
+
+- Each page body is stored once under its SHA-256 (identical pages share one blob).
+- Blobs are zstd-compressed with a dictionary trained per site from its first pages,
+  which works well for brand pages that share most of their markup.
+- index.jsonl is an append-only URL -> blob log; the newest line for a URL wins.
+- Falls back to zlib when the zstandard package is not installed.
+"""
+
+import io
+import os
+import json
+import uuid
+import zlib
+import hashlib
+import threading
+from urllib.parse import urlparse
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+SNAPSHOT_DIR = "snapshot_store"
+DICT_TRAIN_SAMPLES = 32  # Pages per site collected before a dictionary is trained
+DICT_SAMPLE_BYTES = 256 * 1024  # Only this much of each page is kept as a training sample
+DICT_SIZE = 112 * 1024
+COPY_CHUNK_BYTES = 64 * 1024
+COMPRESSION_LEVEL = 10
+
+
+class SnapshotStore:
+    def __init__(self, root: str = SNAPSHOT_DIR, level: int = COMPRESSION_LEVEL,
+                 train_samples: int = DICT_TRAIN_SAMPLES):
+        """
+        Args:
+            root: Directory holding blobs/, dicts/ and index.jsonl
+            level: zstd (or zlib) compression level
+            train_samples: Pages per site to collect before training its dictionary
+        """
+        self.root = root
+        self.level = level
+        self.train_samples = train_samples
+        self.blob_dir = os.path.join(root, "blobs")
+        self.dict_dir = os.path.join(root, "dicts")
+        self.tmp_dir = os.path.join(root, "tmp")
+        self.index_path = os.path.join(root, "index.jsonl")
+        os.makedirs(self.blob_dir, exist_ok=True)
+        os.makedirs(self.dict_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.index: Dict[str, Dict] = {}
+        self.dicts_by_id: Dict[int, object] = {}  # zstd dict id -> ZstdCompressionDict
+        self.dicts_by_site: Dict[str, object] = {}  # site -> its current dictionary
+        self.samples: Dict[str, List[bytes]] = {}  # site -> training samples
+        self.codec = "zstd" if zstandard else "zlib"
+        if zstandard is None:
+            print("[store] zstandard not installed, falling back to zlib compression")
+        self._load_dicts()
+        self._load_index()
+        self.index_file = open(self.index_path, "a", encoding="utf-8")
+
+    # ---------- index ----------
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # Torn last line after a crash
+                self.index[entry["url"]] = entry
+
+    def close(self):
+        with self.lock:
+            self.index_file.close()
+
+    def __contains__(self, url: str) -> bool:
+        return url in self.index
+
+    def urls(self) -> List[str]:
+        return list(self.index)
+
+    def entry(self, url: str) -> Optional[Dict]:
+        return self.index.get(url)
+
+    # ---------- dictionaries ----------
+    def _load_dicts(self):
+        """Dictionary files are named <site>.<dict id>.dict"""
+        if zstandard is None:
+            return
+        for name in sorted(os.listdir(self.dict_dir)):
+            if not name.endswith(".dict"):
+                continue
+            site, dict_id, _ = name.rsplit(".", 2)
+            with open(os.path.join(self.dict_dir, name), "rb") as f:
+                d = zstandard.ZstdCompressionDict(f.read())
+            self.dicts_by_id[int(dict_id)] = d
+            self.dicts_by_site[site] = d
+
+    def _maybe_train(self, site: str, body: bytes):
+        """Collect a sample for the site and train its dictionary once enough are in (lock held)"""
+        samples = self.samples.setdefault(site, [])
+        samples.append(body[:DICT_SAMPLE_BYTES])
+        if len(samples) < self.train_samples:
+            return
+        del self.samples[site]
+        try:
+            trained = zstandard.train_dictionary(DICT_SIZE, samples)
+        except Exception as e:
+            print(f"[store] Dictionary training failed for {site}: {e}")
+            return
+        name = f"{site}.{trained.dict_id()}.dict"
+        with open(os.path.join(self.dict_dir, name), "wb") as f:
+            f.write(trained.as_bytes())
+        self.dicts_by_id[trained.dict_id()] = trained
+        self.dicts_by_site[site] = trained
+        print(f"[store] Trained {len(trained.as_bytes()):,}b zstd dictionary for {site}")
+
+    # ---------- blobs ----------
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.blob_dir, digest[:2], digest + "." + self.codec)
+
+    @staticmethod
+    def site_of(url: str) -> str:
+        """Site key used for dictionaries (host with ':' made filename-safe)"""
+        return urlparse(url).netloc.lower().replace(":", "_")
+
+    def _compress_stream(self, src, dst, size: int, site: str):
+        """Compress src into dst chunk by chunk (never holds the whole body)"""
+        if zstandard is None:
+            compressor = zlib.compressobj(min(self.level, 9))
+            for chunk in iter(lambda: src.read(COPY_CHUNK_BYTES), b""):
+                dst.write(compressor.compress(chunk))
+            dst.write(compressor.flush())
+            return
+        # The frame header records the dictionary id, so reads can find the right one
+        compressor = zstandard.ZstdCompressor(level=self.level, dict_data=self.dicts_by_site.get(site))
+        compressor.copy_stream(src, dst, size=size, read_size=COPY_CHUNK_BYTES)
+
+    def _decompress(self, data: bytes, codec: str) -> bytes:
+        if codec == "zlib":
+            return zlib.decompress(data)
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd snapshots")
+        dict_id = zstandard.get_frame_parameters(data).dict_id
+        dict_data = self.dicts_by_id.get(dict_id) if dict_id else None
+        return zstandard.ZstdDecompressor(dict_data=dict_data).decompress(data)
+
+    # ---------- public API ----------
+    def temp_path(self) -> str:
+        """Fresh path under the store for a body that is still being downloaded"""
+        return os.path.join(self.tmp_dir, uuid.uuid4().hex + ".part")
+
+    def put(self, url: str, body: bytes) -> Dict:
+        """Store a page body held in memory; returns its index entry"""
+        digest = hashlib.sha256(body).hexdigest()
+        return self._put(url, digest, len(body), lambda: io.BytesIO(body))
+
+    def put_file(self, url: str, tmp_path: str, digest: str, size: int) -> Dict:
+        """Store a body already streamed to tmp_path (see temp_path()); the temp file is consumed"""
+        try:
+            return self._put(url, digest, size, lambda: open(tmp_path, "rb"))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _put(self, url: str, digest: str, size: int, open_body) -> Dict:
+        site = self.site_of(url)
+        path = self.blob_path(digest)
+        if not os.path.exists(path):
+            # New content: compress it into a blob (identical pages skip this)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open_body() as src, open(tmp_path, "wb") as dst:
+                self._compress_stream(src, dst, size, site)
+            os.replace(tmp_path, path)
+            if zstandard and site not in self.dicts_by_site:
+                with open_body() as src:
+                    sample = src.read(DICT_SAMPLE_BYTES)
+                with self.lock:
+                    if site not in self.dicts_by_site:
+                        self._maybe_train(site, sample)
+
+        entry = {"url": url, "hash": digest, "size": size, "codec": self.codec, "path": path}
+        with self.lock:
+            self.index[url] = entry
+            self.index_file.write(json.dumps(entry) + "\n")
+            self.index_file.flush()
+        return entry
+
+    def read(self, url: str) -> Optional[bytes]:
+        """Raw page bytes for the URL, or None if it was never stored"""
+        entry = self.index.get(url)
+        if entry is None:
+            return None
+        with open(entry["path"], "rb") as f:
+            data = f.read()
+        return self._decompress(data, entry["codec"])
+
+    def read_text(self, url: str, encoding: str = "utf-8") -> Optional[str]:
+        body = self.read(url)
+        return body.decode(encoding, errors="replace") if body is not None else None
+
+    def iter_pages(self, site: Optional[str] = None) -> Iterator[tuple]:
+        """Yield (url, html) for every stored page, optionally only one site's"""
+        for url in self.urls():
+            if site is None or self.site_of(url) == site:
+                yield url, self.read_text(url)
+
+    def disk_usage(self) -> int:
+        total = 0
+        for dirpath, _, files in os.walk(self.root):
+            total += sum(os.path.getsize(os.path.join(dirpath, name)) for name in files)
+        return total
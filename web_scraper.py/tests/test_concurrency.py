@@ -0,0 +1,83 @@
+import time
+
+import pytest
+
+from concurrency import AdaptiveConcurrency
+
+URL = "https://a.com/page"
+
+
+def request(governor, latency, status_code=200, error=False):
+    assert governor.try_acquire(URL) == 0.0
+    governor.release(URL, latency, status_code, error=error)
+
+
+def test_healthy_responses_raise_limit_additively():
+    governor = AdaptiveConcurrency(initial=4, max_limit=6)
+    for _ in range(5):
+        request(governor, 0.1)
+    assert governor.limit(URL) == 5  # About +1 per full window of healthy responses
+    for _ in range(100):
+        request(governor, 0.1)
+    assert governor.limit(URL) == 6
+
+
+@pytest.mark.parametrize("status_code, error", [(429, False), (503, False), (None, True)])
+def test_throttling_halves_limit(status_code, error):
+    governor = AdaptiveConcurrency(initial=8)
+    request(governor, 0.1, status_code, error)
+    assert governor.limit(URL) == 4
+
+
+def test_burst_of_errors_cuts_once_per_round_trip():
+    governor = AdaptiveConcurrency(initial=16)
+    request(governor, 0.5)
+    for _ in range(5):
+        request(governor, 0.5, 503)
+    assert governor.limit(URL) == 8
+
+
+def test_limit_never_drops_below_min():
+    governor = AdaptiveConcurrency(initial=4, min_limit=2)
+    for _ in range(5):
+        request(governor, 0.0, 429)
+        time.sleep(0.001)
+    assert governor.limit(URL) == 2
+
+
+def test_single_slow_response_does_not_cut():
+    governor = AdaptiveConcurrency(initial=8, slow_window=8)
+    for _ in range(10):
+        request(governor, 0.02)
+    limit = governor.limit(URL)
+    request(governor, 1.0)
+    assert governor.limit(URL) == limit
+
+
+def test_jitter_within_absolute_slack_does_not_cut():
+    governor = AdaptiveConcurrency(initial=4, latency_slack=0.25)
+    for i in range(50):
+        request(governor, 0.02 if i % 2 else 0.15)  # 7x the baseline, but only 130 ms
+    assert governor.limit(URL) > 4
+    assert governor.hosts["a.com"].failures == 0
+
+
+def test_sustained_slowness_cuts():
+    governor = AdaptiveConcurrency(initial=8, slow_window=4)
+    for _ in range(10):
+        request(governor, 0.05)
+    limit = governor.limit(URL)
+    for _ in range(4):
+        request(governor, 2.0)
+    assert governor.limit(URL) == limit // 2
+
+
+def test_slots_are_limited_per_host():
+    governor = AdaptiveConcurrency(initial=2)
+    assert governor.try_acquire(URL) == 0.0
+    assert governor.try_acquire(URL) == 0.0
+    assert governor.try_acquire(URL) > 0
+    assert governor.try_acquire("https://b.com/") == 0.0
+    governor.cancel(URL)
+    assert governor.try_acquire(URL) == 0.0
+    assert governor.limit(URL) == 2  # cancel() does not judge the host
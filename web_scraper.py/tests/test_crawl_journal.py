@@ -0,0 +1,58 @@
+from crawl_journal import CrawlJournal
+
+
+def result(url, error=None):
+    return {"url": url, "status_code": 200 if error is None else 500, "error": error}
+
+
+def test_load_replays_last_record_per_url(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = CrawlJournal(path, batch_size=2)
+    journal.record(result("https://a.com/1", "HTTP Error"))
+    journal.record(result("https://a.com/2"))
+    journal.record(result("https://a.com/1"))
+    journal.close()
+
+    results = CrawlJournal.load(path)
+    assert set(results) == {"https://a.com/1", "https://a.com/2"}
+    assert results["https://a.com/1"]["error"] is None
+    assert "ts" not in results["https://a.com/1"]
+    assert CrawlJournal.completed_urls(results) == {"https://a.com/1", "https://a.com/2"}
+
+
+def test_records_are_written_every_batch(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = CrawlJournal(path, batch_size=2)
+    journal.record(result("https://a.com/1"))
+    assert CrawlJournal.load(path) == {}
+    journal.record(result("https://a.com/2"))
+    assert len(CrawlJournal.load(path)) == 2
+    journal.close()
+
+
+def test_resume_skips_torn_line_and_appends(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = CrawlJournal(path)
+    journal.record(result("https://a.com/1"))
+    journal.record(result("https://a.com/2", "Timeout"))
+    journal.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"url": "https://a.com/3", "sta')  # Crash in the middle of a write
+
+    results = CrawlJournal.load(path)
+    assert CrawlJournal.completed_urls(results) == {"https://a.com/1"}
+    assert "https://a.com/3" not in results
+
+    resumed = CrawlJournal(path, resume=True)
+    resumed.record(result("https://a.com/2"))
+    resumed.close()
+    assert CrawlJournal.completed_urls(CrawlJournal.load(path)) == {"https://a.com/1", "https://a.com/2"}
+
+
+def test_without_resume_starts_empty(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = CrawlJournal(path)
+    journal.record(result("https://a.com/1"))
+    journal.close()
+    CrawlJournal(path).close()
+    assert CrawlJournal.load(path) == {}
@@ -0,0 +1,125 @@
+import time
+
+import pytest
+
+from frontier import DONE, FAILED, IN_FLIGHT, PENDING, Frontier
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "frontier.db")
+
+
+def states(frontier):
+    return dict(frontier.conn.execute("SELECT url, state FROM urls"))
+
+
+def test_add_many_skips_duplicates(path):
+    frontier = Frontier(path)
+    assert frontier.add_many(["https://a.com/1", "https://a.com/2", "https://a.com/1"]) == \
+        ["https://a.com/1", "https://a.com/2"]
+    assert frontier.add_many(["https://a.com/2", "https://a.com/3"]) == ["https://a.com/3"]
+    assert len(frontier) == 3
+
+
+def test_claim_takes_highest_priority_then_oldest(path):
+    frontier = Frontier(path)
+    frontier.add_many(["https://a.com/old", "https://a.com/p/1", "https://a.com/new", "https://a.com/p/2"],
+                      priority=lambda url: 100 if "/p/" in url else 0)
+    assert frontier.claim(3) == ["https://a.com/p/1", "https://a.com/p/2", "https://a.com/old"]
+    assert states(frontier)["https://a.com/new"] == PENDING
+    assert frontier.counts()[IN_FLIGHT] == 3
+
+
+def test_claimed_rows_are_not_leased_twice(path):
+    first = Frontier(path, owner="w0@host:1")
+    first.add_many([f"https://a.com/{i}" for i in range(10)])
+    second = Frontier(path, owner="w1@host:2")
+    taken = first.claim(4) + second.claim(10)
+    assert len(taken) == len(set(taken)) == 10
+    assert first.claim(1) == []
+
+
+def test_claim_by_shard(path):
+    frontier = Frontier(path)
+    frontier.add_many([f"https://host{i}.com/page" for i in range(20)])
+    shards = [frontier.claim(100, shard=n, shards=3) for n in range(3)]
+    assert sorted(url for shard in shards for url in shard) == sorted(frontier.iter_urls())
+    for n, urls in enumerate(shards):
+        assert all(url not in other for m, other in enumerate(shards) if m != n for url in urls)
+
+
+def test_iter_pending_limit_returns_unyielded_leases(path):
+    frontier = Frontier(path)
+    frontier.add_many([f"https://a.com/{i}" for i in range(10)])
+    pending = frontier.iter_pending(batch=4)
+    assert [next(pending) for _ in range(2)] == ["https://a.com/0", "https://a.com/1"]
+    pending.close()
+    assert frontier.counts()[IN_FLIGHT] == 2
+    assert list(frontier.iter_pending(batch=4, limit=3)) == ["https://a.com/2", "https://a.com/3", "https://a.com/4"]
+    assert frontier.counts() == {PENDING: 5, IN_FLIGHT: 5, DONE: 0, FAILED: 0}
+
+
+def test_record_marks_done_or_failed_after_flush(path):
+    frontier = Frontier(path)
+    frontier.add_many(["https://a.com/ok", "https://a.com/bad"])
+    frontier.claim(2)
+    flushed = []
+    frontier.before_commit = lambda: flushed.append(True)
+    frontier.record({"url": "https://a.com/ok", "error": None, "status_code": 200})
+    frontier.record({"url": "https://a.com/bad", "error": "HTTP Error", "status_code": 404})
+    assert frontier.counts() == {PENDING: 0, IN_FLIGHT: 0, DONE: 1, FAILED: 1}
+    assert flushed
+
+
+def test_reclaim_expired_leases(path):
+    frontier = Frontier(path)
+    frontier.add_many(["https://a.com/1", "https://a.com/2"])
+    frontier.claim(1, ttl=0.01)
+    frontier.claim(1, ttl=60)
+    time.sleep(0.05)
+    assert frontier.reclaim_expired() == 1
+    assert states(frontier) == {"https://a.com/1": PENDING, "https://a.com/2": IN_FLIGHT}
+
+
+def test_reclaim_fails_url_after_max_leases(path):
+    frontier = Frontier(path)
+    frontier.add("https://a.com/stuck")
+    for _ in range(2):
+        assert frontier.claim(1, ttl=0.01) == ["https://a.com/stuck"]
+        time.sleep(0.05)
+        frontier.reclaim_expired(max_leases=2)
+    assert states(frontier) == {"https://a.com/stuck": FAILED}
+
+
+def test_release_matches_owner_prefix_literally(path):
+    frontier = Frontier(path)
+    frontier.add_many(["https://a.com/1", "https://a.com/2", "https://a.com/3"])
+    for owner in ("w1@my_host:10", "w1@myXhost:11", "w10@my_host:12"):
+        Frontier(path, owner=owner).claim(1)
+    assert frontier.release("w1@my_host:") == 1
+    owners = {row[0] for row in frontier.conn.execute("SELECT lease_owner FROM urls WHERE state = ?", (IN_FLIGHT,))}
+    assert owners == {"w1@myXhost:11", "w10@my_host:12"}
+
+
+def test_close_hands_back_unfinished_leases(path):
+    frontier = Frontier(path)
+    frontier.add_many(["https://a.com/1", "https://a.com/2"])
+    frontier.claim(2)
+    frontier.record({"url": "https://a.com/1", "error": None})
+    frontier.close()
+    assert Frontier(path).counts() == {PENDING: 1, IN_FLIGHT: 0, DONE: 1, FAILED: 0}
+
+
+def test_requeue_after_crash_and_resume(path):
+    frontier = Frontier(path)
+    frontier.add_many(["https://a.com/1", "https://a.com/2", "https://a.com/3"])
+    frontier.claim(2)
+    frontier.record({"url": "https://a.com/1", "error": None})
+    frontier.flush()
+    frontier.conn.close()  # Crash: the lease on /2 is never handed back
+
+    resumed = Frontier(path)
+    assert resumed.requeue() == 1
+    assert resumed.counts() == {PENDING: 2, IN_FLIGHT: 0, DONE: 1, FAILED: 0}
+    assert Frontier(path, reset=True).counts()[PENDING] == 0
@@ -0,0 +1,64 @@
+from http_cache import ValidatorCache
+
+
+def saved_page(tmp_path, name="page.txt"):
+    path = tmp_path / name
+    path.write_text("<html>saved</html>", encoding="utf-8")
+    return str(path)
+
+
+def test_headers_for_unknown_url_is_empty(tmp_path):
+    assert ValidatorCache(str(tmp_path / "cache.json")).headers_for("https://a.com/") == {}
+
+
+def test_update_then_headers_for(tmp_path):
+    cache = ValidatorCache(str(tmp_path / "cache.json"))
+    page = saved_page(tmp_path)
+    cache.update("https://a.com/", {"ETag": '"v1"', "Last-Modified": "Mon, 01 Sep 2025 00:00:00 GMT"}, page, 18)
+    assert cache.headers_for("https://a.com/") == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "Mon, 01 Sep 2025 00:00:00 GMT",
+    }
+
+
+def test_no_validators_means_nothing_to_revalidate(tmp_path):
+    cache = ValidatorCache(str(tmp_path / "cache.json"))
+    page = saved_page(tmp_path)
+    cache.update("https://a.com/", {"ETag": '"v1"'}, page, 18)
+    cache.update("https://a.com/", {}, page, 18)
+    assert cache.headers_for("https://a.com/") == {}
+
+
+def test_missing_saved_body_disables_revalidation(tmp_path):
+    cache = ValidatorCache(str(tmp_path / "cache.json"))
+    page = saved_page(tmp_path)
+    cache.update("https://a.com/", {"ETag": '"v1"'}, page, 18)
+    (tmp_path / "page.txt").unlink()
+    assert cache.get("https://a.com/") is None
+    assert cache.headers_for("https://a.com/") == {}
+
+
+def test_touch_refreshes_validators_and_counts_hits(tmp_path):
+    cache = ValidatorCache(str(tmp_path / "cache.json"))
+    page = saved_page(tmp_path)
+    cache.update("https://a.com/", {"ETag": '"v1"'}, page, 18)
+    entry = cache.touch("https://a.com/", {"ETag": '"v2"'})
+    assert entry["path"] == page
+    assert entry["content_length"] == 18
+    assert cache.headers_for("https://a.com/") == {"If-None-Match": '"v2"'}
+    assert cache.hits == 1
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = ValidatorCache(path)
+    page = saved_page(tmp_path)
+    cache.update("https://a.com/", {"Last-Modified": "Mon, 01 Sep 2025 00:00:00 GMT"}, page, 18)
+    cache.save()
+    assert ValidatorCache(path).headers_for("https://a.com/") == {"If-Modified-Since": "Mon, 01 Sep 2025 00:00:00 GMT"}
+
+
+def test_unreadable_file_starts_empty(tmp_path):
+    path = tmp_path / "cache.json"
+    path.write_text("{not json", encoding="utf-8")
+    assert ValidatorCache(str(path)).entries == {}
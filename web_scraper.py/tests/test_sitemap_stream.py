@@ -0,0 +1,78 @@
+import gzip
+import io
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from sitemap_stream import iter_sitemap
+
+URLSET = (b'<?xml version="1.0" encoding="UTF-8"?>\n'
+          b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+          b'  <url><loc> https://a.com/1 </loc><lastmod>2025-09-01</lastmod><priority>0.8</priority></url>\n'
+          b'  <url><loc>https://a.com/2?x=1&amp;y=2</loc></url>\n'
+          b'  <url><lastmod>2025-09-02</lastmod></url>\n'
+          b'</urlset>\n')
+INDEX = (b'<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+         b'<sitemap><loc>https://a.com/pages.xml</loc></sitemap>'
+         b'<sitemap><loc>https://a.com/products.xml.gz</loc></sitemap>'
+         b'</sitemapindex>')
+
+
+def parse(body: bytes):
+    return list(iter_sitemap(io.BytesIO(body)))
+
+
+def test_urlset_entries():
+    assert parse(URLSET) == [
+        ("urlset", None),
+        ("urlset", {"loc": "https://a.com/1", "lastmod": "2025-09-01", "priority": "0.8"}),
+        ("urlset", {"loc": "https://a.com/2?x=1&y=2"}),
+    ]
+
+
+def test_sitemap_index():
+    assert parse(INDEX) == [
+        ("sitemapindex", None),
+        ("sitemapindex", {"loc": "https://a.com/pages.xml"}),
+        ("sitemapindex", {"loc": "https://a.com/products.xml.gz"}),
+    ]
+
+
+def test_gzipped_sitemap_is_decompressed():
+    assert parse(gzip.compress(URLSET)) == parse(URLSET)
+
+
+def test_malformed_xml_raises_after_the_entries_before_it():
+    body = URLSET.replace(b"&amp;", b"&")
+    entries = []
+    with pytest.raises(ET.ParseError):
+        for kind, entry in iter_sitemap(io.BytesIO(body)):
+            entries.append(entry)
+    assert entries == [None, {"loc": "https://a.com/1", "lastmod": "2025-09-01", "priority": "0.8"}]
+
+
+def test_truncated_xml_raises():
+    with pytest.raises(ET.ParseError):
+        parse(URLSET[:-20])
+
+
+def test_truncated_gzip_raises_eof():
+    with pytest.raises(EOFError):
+        parse(gzip.compress(URLSET * 50)[:-40])
+
+
+def test_reads_a_non_seekable_stream_in_chunks():
+    class Chunked(io.RawIOBase):
+        def __init__(self, data):
+            self.data = data
+
+        def readable(self):
+            return True
+
+        def readinto(self, buffer):
+            n = min(len(buffer), 7)
+            chunk, self.data = self.data[:n], self.data[n:]
+            buffer[:len(chunk)] = chunk
+            return len(chunk)
+
+    assert list(iter_sitemap(Chunked(gzip.compress(URLSET)))) == parse(URLSET)
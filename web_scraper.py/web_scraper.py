@@ -1,7 +1,7 @@
 import requests
-import xml.etree.ElementTree as ET
 from urllib.parse import urlparse
-import json
+from concurrent.futures import ThreadPoolExecutor
+from sitemap_stream import iter_sitemap, SitemapOutputWriter
 
 # ----------- CONFIG / STATIC INPUT -----------
 URL_INPUT = "https://www.tanyapepsodent.com/home.html"
@@ -16,6 +16,8 @@ url_sitemap_dict = {
     "https://www.tanyapepsodent.com/home.html": "https://www.tanyapepsodent.com/sitemap-index.xml",
     "https://www.unilever.com/": "https://www.unilever.com/sitemap.xml"
 }
+
+SITEMAP_WORKERS = 8  # Child sitemaps fetched in parallel
 # ----------------------------------------------
 
 BROWSER_HEADERS = {
@@ -47,50 +49,71 @@ def cookie_header_to_dict(cookie_str: str) -> dict:
         d[k.strip()] = v.strip()
     return d
 
-def extract_urls_from_sitemap(sitemap_url, session, base_domain, result_dict, counts_dict):
-    """Extract URLs from either sitemap.xml or sitemap-index.xml and save in dict"""
-    urls = []
+def load_sitemap(sitemap_url, session, base_domain):
+    """Stream-parse one sitemap; returns (kind, locs) or (None, []) on failure"""
+    kind, locs = None, []
     try:
-        resp = session.get(sitemap_url, timeout=30)
+        resp = session.get(sitemap_url, timeout=30, stream=True)
         resp.raise_for_status()
     except Exception as e:
         print(f"[ERROR] Failed to fetch {sitemap_url}: {e}")
-        return urls
+        return None, []
 
     try:
-        root = ET.fromstring(resp.content)
+        resp.raw.decode_content = True
+        for kind, entry in iter_sitemap(resp.raw):
+            if entry is None:
+                continue
+            if kind == "urlset" and urlparse(entry["loc"]).netloc.lower() != base_domain:
+                continue
+            locs.append(entry["loc"])
     except Exception as e:
         print(f"[ERROR] Failed to parse XML from {sitemap_url}: {e}")
-        return urls
+        return None, []
+    finally:
+        resp.close()
+    return kind, locs
+
+def process_sitemap(sitemap_url, loaded, session, base_domain, result_dict, counts_dict, executor,
+                    writer=None, structure=None):
+    """Walk an already-loaded sitemap; child sitemaps are loaded in parallel on the executor"""
+    urls = []
+    kind, locs = loaded
 
     try:
-        if root.tag.endswith("sitemapindex"):
+        if kind == "sitemapindex":
             result_dict[sitemap_url] = {}
             counts_dict[sitemap_url] = 0
-            for loc in root.findall(".//{*}loc"):
-                if loc is not None and loc.text:
-                    child_sitemap = loc.text.strip()
-                    try:
-                        child_urls = extract_urls_from_sitemap(child_sitemap, session, base_domain, result_dict[sitemap_url], counts_dict)
-                        urls.extend(child_urls)
-                        counts_dict[sitemap_url] += len(child_urls)
-                    except Exception as e:
-                        print(f"[ERROR] Failed processing child sitemap {child_sitemap}: {e}")
-        elif root.tag.endswith("urlset"):
-            page_urls = []
-            for loc in root.findall(".//{*}loc"):
-                if loc is not None and loc.text:
-                    url = loc.text.strip()
-                    if urlparse(url).netloc.lower() == base_domain:
-                        page_urls.append(url)
-            result_dict[sitemap_url] = page_urls
-            counts_dict[sitemap_url] = len(page_urls)
-            urls.extend(page_urls)
+            # map() yields in sitemap order, so the output matches a sequential walk
+            child_loaded = executor.map(lambda u: load_sitemap(u, session, base_domain), locs)
+            for child_sitemap, child in zip(locs, child_loaded):
+                try:
+                    child_urls = process_sitemap(child_sitemap, child, session, base_domain,
+                                                 result_dict[sitemap_url], counts_dict, executor, writer, structure)
+                    urls.extend(child_urls)
+                    counts_dict[sitemap_url] += len(child_urls)
+                except Exception as e:
+                    print(f"[ERROR] Failed processing child sitemap {child_sitemap}: {e}")
+        elif kind == "urlset":
+            result_dict[sitemap_url] = locs
+            counts_dict[sitemap_url] = len(locs)
+            urls.extend(locs)
+            if writer is not None:
+                writer.add_urls(locs)
+                writer.checkpoint(structure, counts_dict)
     except Exception as e:
         print(f"[ERROR] Unexpected error processing {sitemap_url}: {e}")
 
     return urls
 
+def extract_urls_from_sitemap(sitemap_url, session, base_domain, result_dict, counts_dict, writer=None):
+    """Extract URLs from either sitemap.xml or sitemap-index.xml and save in dict"""
+    loaded = load_sitemap(sitemap_url, session, base_domain)
+    structure = {sitemap_url: result_dict}
+    with ThreadPoolExecutor(max_workers=SITEMAP_WORKERS) as executor:
+        return process_sitemap(sitemap_url, loaded, session, base_domain, result_dict, counts_dict,
+                               executor, writer, structure)
+
 if __name__ == "__main__":
     sitemap_url = url_sitemap_dict.get(URL_INPUT)
     if not sitemap_url:
@@ -108,29 +131,7 @@ if __name__ == "__main__":
         sitemap_data = {}
         counts_data = {}
 
-        all_urls = extract_urls_from_sitemap(sitemap_url, session, base_domain, sitemap_data, counts_data)
-
-        # Save TXT
-        try:
-            with open("urls.txt", "w", encoding="utf-8") as f:
-                for u in all_urls:
-                    f.write(u + "\n")
-            print(f"Saved {len(all_urls)} URLs to urls.txt")
-        except Exception as e:
-            print(f"[ERROR] Failed saving urls.txt: {e}")
-
-        # Save JSON with full structure
-        try:
-            with open("sitemap.json", "w", encoding="utf-8") as f:
-                json.dump({sitemap_url: sitemap_data}, f, indent=4)
-            print("Full structure saved to sitemap.json")
-        except Exception as e:
-            print(f"[ERROR] Failed saving sitemap.json: {e}")
-
-        # Save counts separately
-        try:
-            with open("sitemap_counts.json", "w", encoding="utf-8") as f:
-                json.dump(counts_data, f, indent=4)
-            print("Per-sitemap counts saved to sitemap_counts.json")
-        except Exception as e:
-            print(f"[ERROR] Failed saving sitemap_counts.json: {e}")
\ No newline at end of file
+        # urls.txt grows as each sitemap is parsed; the JSON files are checkpointed along the way
+        writer = SitemapOutputWriter("urls.txt", "sitemap.json", "sitemap_counts.json")
+        all_urls = extract_urls_from_sitemap(sitemap_url, session, base_domain, sitemap_data, counts_data, writer)
+        writer.close({sitemap_url: sitemap_data}, counts_data)